@@ -33,6 +33,9 @@ if not app.config['SQLALCHEMY_DATABASE_URI']:
     raise RuntimeError("DATABASE_URL is not set. Check your .env file.")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Inventory costing method: 'average' (weighted average) or 'fifo'
+app.config['INVENTORY_COSTING_METHOD'] = os.getenv('INVENTORY_COSTING_METHOD', 'average')
+
 # Initialize extensions
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
@@ -83,6 +86,8 @@ from routes.inventoryRoutes import inventory_bp
 from routes.productsupplierRoutes import product_supplier_bp
 from routes.maintenanceRoutes import maintenance_bp
 from routes.departmentrequestRoutes import departmentrequest_bp
+from routes.forecastRoutes import forecast_bp
+from routes.dashboardRoutes import dashboard_bp
 
 app.register_blueprint(department_bp)
 app.register_blueprint(supplier_bp)
@@ -95,6 +100,11 @@ app.register_blueprint(inventory_bp)
 app.register_blueprint(product_supplier_bp)
 app.register_blueprint(maintenance_bp)
 app.register_blueprint(departmentrequest_bp)
+app.register_blueprint(forecast_bp)
+app.register_blueprint(dashboard_bp)
+
+# Register CLI commands for scheduled jobs
+import commands
 
 # Test database connection
 @app.route("/test-db")
@@ -105,6 +115,16 @@ def test_db():
     except Exception as e:
         return jsonify({"message": "Database connection failed", "error": str(e)}), 500
 
+# Hit/miss counters for the in-process caches
+@app.route("/api/cache/stats")
+def cache_stats():
+    from utils.cache import reference_cache, scorecard_cache, report_cache
+    return jsonify({
+        'reference': reference_cache.stats(),
+        'scorecards': scorecard_cache.stats(),
+        'reports': report_cache.stats()
+    }), 200
+
 # Authentication routes
 @app.route('/login', methods=['POST'])
 def login_post():
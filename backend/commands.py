@@ -0,0 +1,77 @@
+import click
+from app import app
+
+# Flask CLI commands for scheduled jobs, e.g. `flask --app app snapshot-inventory` from cron
+
+@app.cli.command('snapshot-inventory')
+def snapshot_inventory_command():
+    """Fold recent inventory movements into per-product snapshots."""
+    from services.inventoryledgerServices import take_snapshots
+
+    result = take_snapshots()
+    click.echo(f"Recorded {result['opening_balances']} opening balances and {result['snapshots_created']} snapshots.")
+
+@app.cli.command('ensure-search-index')
+def ensure_search_index_command():
+    """Create the product search index on a database created before it existed."""
+    from sqlalchemy import text
+    from app import db
+    from models.products import PRODUCT_SEARCH_DDL
+
+    statements = PRODUCT_SEARCH_DDL.get(db.engine.dialect.name)
+    if not statements:
+        click.echo(f"No search index is defined for {db.engine.dialect.name}.")
+        return
+
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+    click.echo("Product search index is ready.")
+
+@app.cli.command('rebuild-purchase-rollup')
+def rebuild_purchase_rollup_command():
+    """Recompute the approved purchase counters and totals from the purchase requests."""
+    from services.purchaseServices import rebuild_approved_purchase_counts
+
+    rows = rebuild_approved_purchase_counts()
+    click.echo(f"Rebuilt {rows} approved purchase counters.")
+
+@app.cli.command('backfill-price-history')
+def backfill_price_history_command():
+    """Record the current listed price of every product-supplier pairing that has no price history."""
+    from services.productsupplierServices import backfill_price_history
+
+    rows = backfill_price_history()
+    click.echo(f"Recorded {rows} listed prices.")
+
+@app.cli.command('plan-replenishment')
+@click.option('--window-days', default=30, show_default=True, help='Days of department requests used to estimate demand.')
+@click.option('--cover-days', default=14, show_default=True, help='Days of demand each order should cover beyond the reorder point.')
+@click.option('--dry-run', is_flag=True, help='Print the plan without creating draft purchase requests.')
+def plan_replenishment_command(window_days, cover_days, dry_run):
+    """Create draft purchase requests for every product at or below its reorder point."""
+    from services.replenishmentServices import plan_replenishment
+
+    plan = plan_replenishment(window_days, cover_days, dry_run)
+    action = 'Would create' if dry_run else 'Created'
+    click.echo(f"{action} {plan['planned']} draft purchase requests totalling {plan['total_amount']}.")
+    if plan['products_without_supplier']:
+        click.echo(f"{len(plan['products_without_supplier'])} products need stock but have no active supplier.")
+
+@app.cli.command('refresh-forecasts')
+@click.option('--full', is_flag=True, help='Refit every product, not only those with new department requests.')
+def refresh_forecasts_command(full):
+    """Refit demand forecasts from department request history."""
+    from services.forecastServices import refresh_forecasts
+
+    result = refresh_forecasts(full=full)
+    click.echo(f"Refreshed {result['series_refreshed']} product forecasts.")
+
+@app.cli.command('generate-maintenance')
+@click.option('--horizon-days', default=365, show_default=True, help='Days ahead to create preventive maintenance jobs for.')
+def generate_maintenance_command(horizon_days):
+    """Create the upcoming pending jobs of every active preventive maintenance schedule."""
+    from services.maintenancescheduleServices import generate_preventive_maintenance
+
+    result = generate_preventive_maintenance(horizon_days)
+    click.echo(f"Created {result['jobs_created']} jobs from {result['schedules_processed']} schedules through {result['generated_through']}.")
@@ -5,12 +5,19 @@ from models.supplier import Supplier
 from models.department import DepartmentFacility
 from models.products import Product
 from models.productsupplier import ProductSupplier
+from models.productsupplierprice import ProductSupplierPrice
 from models.purchase import PurchaseRequest
+from models.purchaserollup import ApprovedPurchaseCount, ApprovedPurchaseTotal
 from models.evaluate import Evaluation
 from models.damage import DamagedItem
 from models.inventory import Inventory
 from models.maintenance import Maintenance
+from models.maintenanceschedule import MaintenanceSchedule
 from models.departmentrequest import DepartmentRequest
+from models.demandforecast import DemandForecast
+from models.inventorymovement import InventoryMovement
+from models.inventorysnapshot import InventorySnapshot
+from models.costlayer import CostLayer
 import os
 
 # # Create the tables and define triggers
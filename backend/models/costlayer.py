@@ -0,0 +1,37 @@
+from app import db
+from datetime import datetime
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+class CostLayer(db.Model):
+    __tablename__ = 'cost_layers'
+
+    layer_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    unit_cost = db.Column(db.Numeric(10, 2), nullable=False)
+    quantity_received = db.Column(db.Integer, nullable=False)
+    quantity_remaining = db.Column(db.Integer, nullable=False)
+    received_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+
+    __table_args__ = (
+        # Only layers with stock left are ever read, oldest first
+        db.Index(
+            'cost_layers_open_idx', 'product_id', 'layer_id',
+            postgresql_where=db.text('quantity_remaining > 0'),
+            sqlite_where=db.text('quantity_remaining > 0')
+        ),
+    )
+
+    def __repr__(self):
+        return f"<CostLayer {self.layer_id} for Product {self.product_id}: {self.quantity_remaining} @ {self.unit_cost}>"
+
+    def to_dict(self):
+        return {
+            'layer_id': self.layer_id,
+            'product_id': self.product_id,
+            'unit_cost': str(self.unit_cost),
+            'quantity_received': self.quantity_received,
+            'quantity_remaining': self.quantity_remaining,
+            'received_at': self.received_at.isoformat() if self.received_at else None
+        }
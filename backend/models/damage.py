@@ -1,7 +1,10 @@
 from app import db
 from datetime import datetime
+import pytz
 from enum import Enum
 
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
 class ReturnStatusEnum(Enum):
     pending = "pending"
     replaced = "replaced"
@@ -15,13 +18,21 @@ class DamagedItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     return_status = db.Column(db.Enum(ReturnStatusEnum), nullable=False, default=ReturnStatusEnum.pending)
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ), onupdate=lambda: datetime.now(MANILA_TZ))
 
     # Relationships
     evaluation = db.relationship('Evaluation', backref='damaged_items', lazy=True)
     product = db.relationship('Product', backref='damaged_items', lazy=True)
 
+    # Keyset listing by status or product, the grouped status counts and the product timeline
+    __table_args__ = (
+        db.Index('damaged_items_status_idx', 'return_status', 'damaged_item_id'),
+        db.Index('damaged_items_product_idx', 'product_id', 'damaged_item_id'),
+        db.Index('damaged_items_created_idx', 'created_at'),
+        db.Index('damaged_items_product_created_idx', 'product_id', 'created_at', 'damaged_item_id'),
+    )
+
     def __repr__(self):
         return f"<DamagedItem {self.damaged_item_id}>"
 
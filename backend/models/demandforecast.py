@@ -0,0 +1,50 @@
+from app import db
+from datetime import datetime
+import pytz
+from enum import Enum
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+class ForecastGranularity(Enum):
+    daily = "daily"
+    weekly = "weekly"
+
+# Fitted demand per period for one product, from its department request history.
+# last_request_id is the newest request folded in; a product is refit only once
+# requests newer than it arrive.
+class DemandForecast(db.Model):
+    __tablename__ = 'demand_forecasts'
+
+    forecast_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    granularity = db.Column(db.Enum(ForecastGranularity), nullable=False)
+    periods_observed = db.Column(db.Integer, nullable=False)
+    last_period = db.Column(db.Date, nullable=False)
+    last_period_quantity = db.Column(db.Integer, nullable=False)
+    moving_average = db.Column(db.Numeric(12, 4), nullable=False)
+    smoothed = db.Column(db.Numeric(12, 4), nullable=False)
+    last_request_id = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+
+    # Relationships
+    product = db.relationship('Product')
+
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'granularity', name='demand_forecasts_product_granularity_unique'),
+    )
+
+    def __repr__(self):
+        return f"<DemandForecast {self.granularity.value} for Product {self.product_id}>"
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'product_name': self.product.name if self.product else None,
+            'granularity': self.granularity.value,
+            'periods_observed': self.periods_observed,
+            'last_period': self.last_period.isoformat(),
+            'last_period_quantity': self.last_period_quantity,
+            'moving_average': str(self.moving_average),
+            'exponential_smoothing': str(self.smoothed),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
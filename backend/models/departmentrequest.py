@@ -14,6 +14,13 @@ class DepartmentRequest(db.Model):
     department = db.relationship('DepartmentFacility', backref='department_requests', lazy=True)
     product = db.relationship('Product', backref='department_requests', lazy=True)
 
+    # Per-product history reads for forecasting and consumption, and a covering index
+    # for the per-department consumption totals
+    __table_args__ = (
+        db.Index('department_requests_product_date_idx', 'product_id', 'request_date'),
+        db.Index('department_requests_department_product_idx', 'department_id', 'product_id', 'request_date', 'quantity'),
+    )
+
     def __repr__(self):
         return f"<DepartmentRequest {self.department_request_id}>"
 
@@ -17,6 +17,11 @@ class Evaluation(db.Model):
     # Relationship to the PurchaseRequest model
     purchase_request = db.relationship('PurchaseRequest', backref='evaluations')
 
+    # Evaluations of a product's purchase requests, for the product timeline
+    __table_args__ = (
+        db.Index('evaluation_request_idx', 'request_id'),
+    )
+
     def __repr__(self):
         return f"<Evaluation {self.evaluation_id}>"
 
@@ -8,11 +8,15 @@ class Inventory(db.Model):
     __tablename__ = 'inventory'
 
     inventory_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     running_amount = db.Column(db.Numeric(10, 2), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(MANILA_TZ))
-    updated_at = db.Column(db.DateTime, default=datetime.now(MANILA_TZ), onupdate=datetime.now(MANILA_TZ))
+    reorder_threshold = db.Column(db.Integer, nullable=False, default=20, server_default='20')
+    # Replenishment planning: days from ordering to receipt, and stock kept back for demand spikes
+    lead_time_days = db.Column(db.Integer, nullable=False, default=7, server_default='7')
+    safety_stock = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ), onupdate=lambda: datetime.now(MANILA_TZ))
 
     # Relationship with Product
     product = db.relationship('Product', backref='inventory')
@@ -31,6 +35,12 @@ class Inventory(db.Model):
             'product_type': self.product.product_type.name if self.product and self.product.product_type else None,
             'quantity': self.quantity,
             'running_amount': str(self.running_amount),
+            'reorder_threshold': self.reorder_threshold,
+            'lead_time_days': self.lead_time_days,
+            'safety_stock': self.safety_stock,
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
+
+# Index the stock gap so low-stock lookups only read the rows below their threshold
+db.Index('inventory_reorder_gap_idx', Inventory.quantity - Inventory.reorder_threshold)
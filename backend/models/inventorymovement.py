@@ -0,0 +1,62 @@
+from app import db
+from datetime import datetime
+import pytz
+from enum import Enum
+from sqlalchemy import event
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+class MovementType(Enum):
+    receipt = "receipt"
+    replacement = "replacement"
+    issue = "issue"
+    adjustment = "adjustment"
+
+class InventoryMovement(db.Model):
+    __tablename__ = 'inventory_movements'
+
+    movement_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    movement_type = db.Column(db.Enum(MovementType), nullable=False)
+    quantity_change = db.Column(db.Integer, nullable=False)
+    amount_change = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    # evaluation_id, damaged_item_id or department_request_id, depending on movement_type
+    reference_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ), nullable=False)
+
+    # Relationships
+    product = db.relationship('Product', backref=db.backref('inventory_movements', lazy='dynamic'))
+
+    __table_args__ = (
+        db.Index('inventory_movements_product_movement_idx', 'product_id', 'movement_id'),
+        db.Index('inventory_movements_product_created_idx', 'product_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<InventoryMovement {self.movement_id} {self.movement_type.value} {self.quantity_change}>"
+
+    def to_dict(self):
+        return {
+            'movement_id': self.movement_id,
+            'product_id': self.product_id,
+            'movement_type': self.movement_type.value,
+            'quantity_change': self.quantity_change,
+            'amount_change': str(self.amount_change),
+            'reference_id': self.reference_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+# The ledger is append-only: movements are corrected with new adjustment rows
+@event.listens_for(InventoryMovement, "before_update")
+def prevent_movement_update(mapper, connection, target):
+    """
+    Reject updates to recorded inventory movements.
+    """
+    raise ValueError("Inventory movements are append-only and cannot be updated")
+
+@event.listens_for(InventoryMovement, "before_delete")
+def prevent_movement_delete(mapper, connection, target):
+    """
+    Reject deletion of recorded inventory movements.
+    """
+    raise ValueError("Inventory movements are append-only and cannot be deleted")
@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+class InventorySnapshot(db.Model):
+    __tablename__ = 'inventory_snapshots'
+
+    snapshot_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    running_amount = db.Column(db.Numeric(12, 2), nullable=False)
+    # Every movement of the product up to and including this id is folded into the snapshot
+    last_movement_id = db.Column(db.Integer, nullable=False)
+    # created_at of that last movement, i.e. the point in time the snapshot describes
+    snapshot_date = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+
+    __table_args__ = (
+        db.Index('inventory_snapshots_product_date_idx', 'product_id', 'snapshot_date'),
+    )
+
+    def __repr__(self):
+        return f"<InventorySnapshot {self.snapshot_id} for Product {self.product_id}>"
+
+    def to_dict(self):
+        return {
+            'snapshot_id': self.snapshot_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'running_amount': str(self.running_amount),
+            'last_movement_id': self.last_movement_id,
+            'snapshot_date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
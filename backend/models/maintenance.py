@@ -16,6 +16,8 @@ class Maintenance(db.Model):
 
     maintenance_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    # Set on jobs generated from a preventive maintenance schedule
+    schedule_id = db.Column(db.Integer, db.ForeignKey('maintenance_schedules.schedule_id'))
     description = db.Column(db.Text)
     engineer_name = db.Column(db.String(100), nullable=False)
     scheduled_date = db.Column(db.DateTime(timezone=True))
@@ -29,6 +31,19 @@ class Maintenance(db.Model):
     # Relationships
     product = db.relationship('Product', backref=db.backref('maintenance', lazy=True))
 
+    # Calendar range scans, per-engineer weeks, the open-job conflict sweep and the product timeline
+    __table_args__ = (
+        db.Index('maintenance_scheduled_idx', 'scheduled_date', 'maintenance_id'),
+        db.Index('maintenance_completed_idx', 'completed_date'),
+        db.Index('maintenance_engineer_scheduled_idx', 'engineer_name', 'scheduled_date'),
+        db.Index('maintenance_status_scheduled_idx', 'status', 'scheduled_date'),
+        db.Index('maintenance_product_status_idx', 'product_id', 'status'),
+        db.Index('maintenance_product_created_idx', 'product_id', 'created_at', 'maintenance_id'),
+        db.Index('maintenance_product_completed_idx', 'product_id', 'completed_date', 'maintenance_id'),
+        # A schedule generates at most one job per occurrence
+        db.UniqueConstraint('schedule_id', 'scheduled_date', name='maintenance_schedule_occurrence_unique'),
+    )
+
     def __repr__(self):
         return f"<Maintenance {self.maintenance_id} - {self.engineer_name}>"
 
@@ -39,6 +54,7 @@ class Maintenance(db.Model):
         return {
             'maintenance_id': self.maintenance_id,
             'product_id': self.product_id,
+            'schedule_id': self.schedule_id,
             'product_name': product.name if product else None,
             'brand': product.brand if product else None,
             'model': product.model if product else None,
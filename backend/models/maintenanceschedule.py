@@ -0,0 +1,59 @@
+from app import db
+from datetime import datetime
+import pytz
+from enum import Enum
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+class RecurrenceType(Enum):
+    interval = "interval"
+    monthly = "monthly"
+
+# Preventive maintenance rule for an asset. Occurrences are anchored on start_date:
+# every interval_days from it, or monthly on day_of_month at its time of day.
+# generated_through is the horizon up to which pending jobs have been created.
+class MaintenanceSchedule(db.Model):
+    __tablename__ = 'maintenance_schedules'
+
+    schedule_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    engineer_name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    recurrence_type = db.Column(db.Enum(RecurrenceType), nullable=False)
+    interval_days = db.Column(db.Integer)
+    day_of_month = db.Column(db.Integer)
+    start_date = db.Column(db.DateTime(timezone=True), nullable=False)
+    end_date = db.Column(db.DateTime(timezone=True))
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    generated_through = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(MANILA_TZ))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(MANILA_TZ), onupdate=lambda: datetime.now(MANILA_TZ))
+
+    # Relationships
+    product = db.relationship('Product')
+
+    __table_args__ = (
+        db.Index('maintenance_schedules_active_idx', 'active', 'schedule_id'),
+        db.Index('maintenance_schedules_product_idx', 'product_id'),
+    )
+
+    def __repr__(self):
+        return f"<MaintenanceSchedule {self.schedule_id} for Product {self.product_id}>"
+
+    def to_dict(self):
+        return {
+            'schedule_id': self.schedule_id,
+            'product_id': self.product_id,
+            'product_name': self.product.name if self.product else None,
+            'engineer_name': self.engineer_name,
+            'description': self.description,
+            'recurrence_type': self.recurrence_type.value,
+            'interval_days': self.interval_days,
+            'day_of_month': self.day_of_month,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'active': self.active,
+            'generated_through': self.generated_through.isoformat() if self.generated_through else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
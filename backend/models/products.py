@@ -2,6 +2,7 @@ from app import db
 from datetime import datetime
 import pytz
 from enum import Enum
+from sqlalchemy import DDL, event
 
 MANILA_TZ = pytz.timezone("Asia/Manila")
 
@@ -14,9 +15,9 @@ class Product(db.Model):
 
     product_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(100), nullable=False, index=True)
     product_type = db.Column(db.Enum(ProductType), nullable=False)
-    brand = db.Column(db.String(100))
+    brand = db.Column(db.String(100), index=True)
     model = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ), onupdate=lambda: datetime.now(MANILA_TZ))
@@ -40,3 +41,39 @@ class Product(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+# Search indexes. SQLAlchemy cannot declare these, so they are created with the table.
+# The search service must use the same expression for PostgreSQL to pick the index.
+PRODUCT_SEARCH_EXPRESSION = "lower(name || ' ' || coalesce(brand, '') || ' ' || coalesce(model, '') || ' ' || category)"
+
+PRODUCT_SEARCH_DDL = {
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS products_search_trgm_idx ON products USING gin (({PRODUCT_SEARCH_EXPRESSION}) gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS products_name_prefix_idx ON products (lower(name) text_pattern_ops)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, brand, model, category, content='products', content_rowid='product_id', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, brand, model, category) "
+        "VALUES (new.product_id, new.name, new.brand, new.model, new.category); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, brand, model, category) "
+        "VALUES ('delete', old.product_id, old.name, old.brand, old.model, old.category); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, brand, model, category) "
+        "VALUES ('delete', old.product_id, old.name, old.brand, old.model, old.category); "
+        "INSERT INTO products_fts(rowid, name, brand, model, category) "
+        "VALUES (new.product_id, new.name, new.brand, new.model, new.category); END",
+        # Index any rows that already exist
+        "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+    ],
+}
+
+for dialect, statements in PRODUCT_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+
+# The FTS table is not part of the metadata, so drop it along with products
+event.listen(Product.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect='sqlite'))
@@ -28,6 +28,12 @@ class ProductSupplier(db.Model):
     # Unique Constraint (product_id and supplier_id must be unique together)
     __table_args__ = (
         db.UniqueConstraint('product_id', 'supplier_id', name='product_supplier_unique'),
+        # Active offers of a product in price order, for the cheapest-supplier lookup
+        db.Index(
+            'product_suppliers_active_price_idx', 'product_id', 'unit_price',
+            postgresql_where=db.text("status = 'active'"),
+            sqlite_where=db.text("status = 'active'")
+        ),
     )
 
     def __repr__(self):
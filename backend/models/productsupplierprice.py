@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+# One row per listed price a supplier has quoted for a product, newest last.
+# Keyed by product and supplier rather than the pairing, so history survives its deletion.
+class ProductSupplierPrice(db.Model):
+    __tablename__ = 'product_supplier_prices'
+
+    price_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.supplier_id'), nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
+    effective_at = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+
+    # Relationships
+    supplier = db.relationship('Supplier')
+
+    __table_args__ = (
+        db.Index('product_supplier_prices_product_idx', 'product_id', 'price_id'),
+    )
+
+    def __repr__(self):
+        return f"<ProductSupplierPrice Product: {self.product_id}, Supplier: {self.supplier_id}, Price: {self.unit_price}>"
+
+    def to_dict(self):
+        return {
+            'price_id': self.price_id,
+            'product_id': self.product_id,
+            'supplier_id': self.supplier_id,
+            'supplier_name': self.supplier.supplier_name if self.supplier else None,
+            'unit_price': str(self.unit_price),
+            'effective_at': self.effective_at.isoformat() if self.effective_at else None
+        }
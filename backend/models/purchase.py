@@ -2,12 +2,15 @@ from app import db
 from datetime import datetime
 import pytz
 from enum import Enum
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import column_property
+from models.purchaserollup import apply_approval_deltas, approval_key
 
 # Set Manila timezone
 MANILA_TZ = pytz.timezone("Asia/Manila")
 
 class PurchaseRequestStatusEnum(Enum):
+    draft = "draft"
     pending = "pending"
     approved = "approved"
     rejected = "rejected"
@@ -16,18 +19,27 @@ class PurchaseRequest(db.Model):
     __tablename__ = 'purchase_requests'
 
     request_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    # active_history keeps the previous values that the approval counter listeners compare against
+    product_id = column_property(db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False), active_history=True)
     supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.supplier_id'), nullable=False)
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.Enum(PurchaseRequestStatusEnum), default=PurchaseRequestStatusEnum.pending, nullable=False)
-    request_date = db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ))
+    status = column_property(db.Column(db.Enum(PurchaseRequestStatusEnum), default=PurchaseRequestStatusEnum.pending, nullable=False), active_history=True)
+    request_date = column_property(db.Column(db.DateTime, default=lambda: datetime.now(MANILA_TZ)), active_history=True)
     total_amount = db.Column(db.Numeric(10, 2))
 
     # Relationships
     product = db.relationship('Product', backref='purchase_requests')
     supplier = db.relationship('Supplier', backref='purchase_requests')
 
+    # Composite indexes for the filtered, date-sorted purchase listing
+    __table_args__ = (
+        db.Index('purchase_requests_date_idx', 'request_date', 'request_id'),
+        db.Index('purchase_requests_status_date_idx', 'status', 'request_date', 'request_id'),
+        db.Index('purchase_requests_supplier_date_idx', 'supplier_id', 'request_date', 'request_id'),
+        db.Index('purchase_requests_product_date_idx', 'product_id', 'request_date', 'request_id'),
+    )
+
     def __repr__(self):
         return f"<PurchaseRequest {self.request_id}>"
 
@@ -67,3 +79,46 @@ def calculate_total_amount_before_update(mapper, connection, target):
         target.total_amount = target.unit_price * target.quantity
     else:
         target.total_amount = 0
+
+# Keep approved_purchase_counts in step with approvals made through the ORM.
+# Bulk UPDATEs bypass these listeners and call apply_approval_deltas themselves.
+@event.listens_for(PurchaseRequest, "after_insert")
+def count_approval_after_insert(mapper, connection, target):
+    """
+    Count a purchase request inserted as already approved.
+    """
+    if target.status == PurchaseRequestStatusEnum.approved:
+        apply_approval_deltas(connection, {approval_key(target.product_id, target.request_date): 1})
+
+@event.listens_for(PurchaseRequest, "after_update")
+def count_approval_after_update(mapper, connection, target):
+    """
+    Move the count when the status, product or request date of a request changes.
+    """
+    state = inspect(target)
+
+    def previous(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    was_approved = previous('status') == PurchaseRequestStatusEnum.approved
+    is_approved = target.status == PurchaseRequestStatusEnum.approved
+    if not was_approved and not is_approved:
+        return
+
+    deltas = {}
+    if was_approved:
+        old_key = approval_key(previous('product_id'), previous('request_date'))
+        deltas[old_key] = deltas.get(old_key, 0) - 1
+    if is_approved:
+        new_key = approval_key(target.product_id, target.request_date)
+        deltas[new_key] = deltas.get(new_key, 0) + 1
+    apply_approval_deltas(connection, deltas)
+
+@event.listens_for(PurchaseRequest, "after_delete")
+def count_approval_after_delete(mapper, connection, target):
+    """
+    Uncount an approved purchase request when it is deleted.
+    """
+    if target.status == PurchaseRequestStatusEnum.approved:
+        apply_approval_deltas(connection, {approval_key(target.product_id, target.request_date): -1})
@@ -0,0 +1,93 @@
+from app import db
+from datetime import datetime
+import pytz
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Set Manila timezone
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+# Number of approved purchase requests per product per request day. Maintained as
+# requests move to or from approved, so top-product queries read this small table
+# instead of aggregating every purchase request.
+class ApprovedPurchaseCount(db.Model):
+    __tablename__ = 'approved_purchase_counts'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), primary_key=True)
+    request_day = db.Column(db.Date, primary_key=True)
+    approved_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('approved_purchase_counts_day_idx', 'request_day', 'product_id'),
+    )
+
+    def __repr__(self):
+        return f"<ApprovedPurchaseCount {self.product_id} {self.request_day}>"
+
+# All-time number of approved purchase requests per product, kept alongside the per-day
+# counters so an unwindowed top-N reads the highest totals off an index instead of
+# summing every (product, day) row.
+class ApprovedPurchaseTotal(db.Model):
+    __tablename__ = 'approved_purchase_totals'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), primary_key=True)
+    approved_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ApprovedPurchaseTotal {self.product_id}>"
+
+db.Index(
+    'approved_purchase_totals_rank_idx',
+    ApprovedPurchaseTotal.approved_count.desc(),
+    ApprovedPurchaseTotal.product_id
+)
+
+# Counter key for a purchase request: its product and the day it was requested
+def approval_key(product_id, request_date):
+    return (product_id, request_date.date() if request_date else datetime.now(MANILA_TZ).date())
+
+# Add each row's approved_count to the counter with the same key columns, creating it if missing
+def _increment_counters(connection, table, key_columns, rows):
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        statement = (postgresql if dialect == 'postgresql' else sqlite).insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in key_columns],
+            set_={'approved_count': table.c.approved_count + statement.excluded.approved_count}
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(*[table.c[key] == row[key] for key in key_columns])
+            .values(approved_count=table.c.approved_count + row['approved_count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+# Add deltas ({(product_id, request_day): change}) to the per-day counters and the per-product
+# totals on the given connection, inside the caller's transaction
+def apply_approval_deltas(connection, deltas):
+    rows = [
+        {'product_id': product_id, 'request_day': request_day, 'approved_count': change}
+        for (product_id, request_day), change in deltas.items() if change
+    ]
+    if not rows:
+        return
+
+    totals = {}
+    for row in rows:
+        totals[row['product_id']] = totals.get(row['product_id'], 0) + row['approved_count']
+
+    _increment_counters(connection, ApprovedPurchaseCount.__table__, ('product_id', 'request_day'), rows)
+    _increment_counters(
+        connection,
+        ApprovedPurchaseTotal.__table__,
+        ('product_id',),
+        [{'product_id': product_id, 'approved_count': change} for product_id, change in totals.items() if change]
+    )
@@ -1,12 +1,16 @@
 from flask import Blueprint, request
-from services.damageServices import get_damages, update_damage_status
+from models.damage import DamagedItem
+from models.products import Product
+from utils.etag import etag_collection
+from services.damageServices import get_damages, update_damage_status, replace_damaged_items_batch
 
 damage_bp = Blueprint('damages', __name__, url_prefix='/api/damages')
 
-# Route to get all damages
+# Route to get damaged items, filtered and paginated through the query string, with status counts
 @damage_bp.route('/', methods=['GET'])
+@etag_collection(DamagedItem.updated_at, Product.updated_at)
 def fetch_damages():
-    return get_damages()
+    return get_damages(request.args)
 
 # Route to update damage item status to replaced
 @damage_bp.route('/update/<int:damaged_item_id>', methods=['PUT'])
@@ -18,3 +22,8 @@ def update_status(damaged_item_id):
         return update_damage_status(damaged_item_id)
     except Exception as e:
         return {"error": f"An unexpected error occurred: {str(e)}"}, 500
+
+# Route to mark many damaged items replaced in one transaction
+@damage_bp.route('/update-batch', methods=['PUT'])
+def update_status_batch():
+    return replace_damaged_items_batch(request.get_json())
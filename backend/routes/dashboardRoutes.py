@@ -0,0 +1,10 @@
+from flask import Blueprint
+from services.dashboardServices import get_dashboard_summary
+
+# Create Blueprint for the dashboard
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
+
+# Route to get the dashboard headline counters in one request
+@dashboard_bp.route('/summary', methods=['GET'])
+def fetch_dashboard_summary():
+    return get_dashboard_summary()
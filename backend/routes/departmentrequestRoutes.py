@@ -1,5 +1,5 @@
 from flask import Blueprint, request
-from services.departmentrequestServices import create_department_request, get_department_requests, get_top_purchases_per_department
+from services.departmentrequestServices import create_department_request, create_department_requests_batch, get_department_requests, get_top_purchases_per_department
 
 # Define the Blueprint
 departmentrequest_bp = Blueprint('departmentrequest', __name__, url_prefix='/api/department-request')
@@ -9,15 +9,20 @@ departmentrequest_bp = Blueprint('departmentrequest', __name__, url_prefix='/api
 def handle_create_department_request():
     return create_department_request()
 
+# Define the route for creating a multi-line requisition in one transaction
+@departmentrequest_bp.route('/create-batch', methods=['POST'])
+def handle_create_department_requests_batch():
+    return create_department_requests_batch()
+
 # Define the route for getting all department requests
 @departmentrequest_bp.route('/', methods=['GET'])
 def handle_get_department_requests():
     return get_department_requests()
 
-# Define the route for getting top purchases per department
+# Define the route for getting the top N purchases of every department, optionally within a date range
 @departmentrequest_bp.route('/top-purchases', methods=['GET'])
 def handle_get_top_purchases_per_department():
-    return get_top_purchases_per_department()
+    return get_top_purchases_per_department(request.args)
 
 
 # Define the route for undoing the creation of a department request
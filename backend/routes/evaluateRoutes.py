@@ -1,5 +1,5 @@
 from flask import Blueprint, request
-from services.evaluateServices import evaluate_purchase_request, get_evaluations
+from services.evaluateServices import evaluate_purchase_request, evaluate_purchase_requests_batch, get_evaluations, export_evaluations
 
 # Create Blueprint for evaluation
 evaluate_bp = Blueprint('evaluate', __name__, url_prefix='/api/evaluate')
@@ -14,7 +14,17 @@ def evaluate_request(request_id):
     # Call the service function to evaluate the purchase request
     return evaluate_purchase_request(request_id, undamaged_quantity, damaged_quantity)
 
+# Route to evaluate many delivered purchase requests in one transaction
+@evaluate_bp.route('/create-batch', methods=['POST'])
+def evaluate_requests_batch():
+    return evaluate_purchase_requests_batch(request.get_json())
+
 # Route to get all products
 @evaluate_bp.route('/', methods=['GET'])
 def fetch_evaluations():
-    return get_evaluations()
\ No newline at end of file
+    return get_evaluations()
+
+# Route to stream all evaluations as CSV or NDJSON
+@evaluate_bp.route('/export', methods=['GET'])
+def export_evaluations_route():
+    return export_evaluations(request.args)
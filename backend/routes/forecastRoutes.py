@@ -0,0 +1,20 @@
+from flask import Blueprint, request
+from services.forecastServices import get_forecasts, get_product_forecast, run_forecast_refresh
+
+# Create Blueprint for demand forecasts
+forecast_bp = Blueprint('forecasts', __name__, url_prefix='/api/forecasts')
+
+# Route to list the stored demand forecasts
+@forecast_bp.route('/', methods=['GET'])
+def fetch_forecasts():
+    return get_forecasts(request.args)
+
+# Route to get the demand forecast of a product over the next periods
+@forecast_bp.route('/<int:product_id>', methods=['GET'])
+def fetch_product_forecast(product_id):
+    return get_product_forecast(product_id, request.args)
+
+# Route to refit the forecasts of products with new department requests
+@forecast_bp.route('/refresh', methods=['POST'])
+def refresh_forecasts_route():
+    return run_forecast_refresh(request.get_json(silent=True))
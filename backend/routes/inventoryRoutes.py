@@ -1,16 +1,59 @@
 from flask import Blueprint, request, jsonify, make_response
-from services.inventoryServices import get_inventory, get_notifications
+from models.inventory import Inventory
+from models.products import Product
+from utils.etag import etag_collection
+from services.inventoryServices import get_inventory, export_inventory, get_notifications, update_reorder_threshold
+from services.inventoryledgerServices import get_movement_history, get_stock_at, create_snapshots
+from services.costingServices import get_inventory_valuation
+from services.replenishmentServices import update_replenishment_settings
 
 # Create Blueprint for inventory
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/api/inventory')
 
-# Route to get all inventory
+# Route to get inventory, paginated and filterable through the query string
 @inventory_bp.route('/', methods=['GET'])
+@etag_collection(Inventory.updated_at, Product.updated_at)
 def fetch_inventory():
-    return get_inventory() 
+    return get_inventory(request.args)
+
+# Route to stream the inventory as CSV or NDJSON
+@inventory_bp.route('/export', methods=['GET'])
+def export_inventory_route():
+    return export_inventory(request.args)
 
 # Route to get notifications for low stock items
 @inventory_bp.route('/notifications', methods=['GET'])
 def fetch_notifications():
     notifications = get_notifications()
-    return make_response(jsonify(notifications), 200)
\ No newline at end of file
+    return make_response(jsonify(notifications), 200)
+
+# Route to set the reorder threshold of a product
+@inventory_bp.route('/threshold/<int:product_id>', methods=['PUT'])
+def update_threshold(product_id):
+    data = request.json
+    return update_reorder_threshold(product_id, data)
+
+# Route to set the lead time and safety stock the replenishment planner uses for a product
+@inventory_bp.route('/replenishment/<int:product_id>', methods=['PUT'])
+def update_replenishment(product_id):
+    return update_replenishment_settings(product_id, request.get_json())
+
+# Route to get the movement history of a product
+@inventory_bp.route('/<int:product_id>/movements', methods=['GET'])
+def fetch_movement_history(product_id):
+    return get_movement_history(product_id, request.args)
+
+# Route to get the stock of a product as of a point in time
+@inventory_bp.route('/<int:product_id>/stock-at', methods=['GET'])
+def fetch_stock_at(product_id):
+    return get_stock_at(product_id, request.args)
+
+# Route to fold recent movements into per-product snapshots
+@inventory_bp.route('/snapshots', methods=['POST'])
+def create_inventory_snapshots():
+    return create_snapshots()
+
+# Route to get the inventory valuation under the configured costing method
+@inventory_bp.route('/valuation', methods=['GET'])
+def fetch_inventory_valuation():
+    return get_inventory_valuation(request.args)
@@ -1,5 +1,9 @@
 from flask import Blueprint, request
-from services.maintenanceServices import create_maintenance, get_maintenance, take_action, take_action_completed, take_action_condemned
+from models.maintenance import Maintenance
+from models.products import Product
+from utils.etag import etag_collection
+from services.maintenanceServices import create_maintenance, get_maintenance, take_action, take_action_completed, take_action_condemned, get_maintenance_schedule, get_engineer_workload, get_maintenance_conflicts
+from services.maintenancescheduleServices import create_maintenance_schedules, get_maintenance_schedules, toggle_maintenance_schedule, run_maintenance_generation
 
 # Create Blueprint for maintenance
 maintenance_bp = Blueprint('maintenance', __name__, url_prefix='/api/maintenance')
@@ -25,5 +29,41 @@ def take_action_condemned_route(maintenance_id):
     return take_action_condemned(maintenance_id, data)
 
 @maintenance_bp.route('/', methods=['GET'])
+@etag_collection(Maintenance.updated_at, Product.updated_at)
 def get_maintenance_route():
-    return get_maintenance()    
\ No newline at end of file
+    return get_maintenance()
+
+# Route to get the jobs overlapping start_date..end_date
+@maintenance_bp.route('/schedule', methods=['GET'])
+def get_maintenance_schedule_route():
+    return get_maintenance_schedule(request.args)
+
+# Route to get each engineer's job counts per week
+@maintenance_bp.route('/workload', methods=['GET'])
+def get_engineer_workload_route():
+    return get_engineer_workload(request.args)
+
+# Route to find engineers double-booked on open jobs
+@maintenance_bp.route('/conflicts', methods=['GET'])
+def get_maintenance_conflicts_route():
+    return get_maintenance_conflicts(request.args)
+
+# Route to create a preventive maintenance rule for one or more assets
+@maintenance_bp.route('/schedules', methods=['POST'])
+def create_maintenance_schedules_route():
+    return create_maintenance_schedules(request.get_json())
+
+# Route to list preventive maintenance rules
+@maintenance_bp.route('/schedules', methods=['GET'])
+def get_maintenance_schedules_route():
+    return get_maintenance_schedules(request.args)
+
+# Route to pause or resume a preventive maintenance rule
+@maintenance_bp.route('/schedules/<int:schedule_id>/toggle', methods=['PUT'])
+def toggle_maintenance_schedule_route(schedule_id):
+    return toggle_maintenance_schedule(schedule_id)
+
+# Route to generate the upcoming preventive maintenance jobs
+@maintenance_bp.route('/schedules/generate', methods=['POST'])
+def generate_maintenance_route():
+    return run_maintenance_generation(request.get_json(silent=True))
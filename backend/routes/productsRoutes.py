@@ -1,25 +1,59 @@
 from app import app
 from flask import Blueprint, request
-from services.productsServices import create_product, get_products, update_product, delete_product, get_product_by_id
+from models.products import Product
+from utils.etag import etag_collection
+from services.productsServices import create_product, import_products, search_products, get_products, update_product, delete_product, get_product_by_id
+from services.timelineServices import get_product_timeline
 
 # Create Blueprint for product
 product_bp = Blueprint('product', __name__, url_prefix='/api/products')
 
 # Route to get all products
 @product_bp.route('/', methods=['GET'])
+@etag_collection(Product.updated_at)
 def fetch_products():
     return get_products()
 
+# Route to search products with ranked prefix and fuzzy matches
+@product_bp.route('/search', methods=['GET'])
+def search_products_route():
+    return search_products(request.args)
+
 @product_bp.route('/<int:product_id>', methods=['GET'])
 def get_product_by_id_route(product_id):
     return get_product_by_id(product_id)
 
+# Route to get a product's purchases, evaluations, damages, maintenance and department issues as one stream
+@product_bp.route('/<int:product_id>/timeline', methods=['GET'])
+def get_product_timeline_route(product_id):
+    return get_product_timeline(product_id, request.args)
+
 # Route to create a new products
 @product_bp.route('/create', methods=['POST'])
 def create_new_product():
     data = request.json
     return create_product(data)
 
+# Route to import many products from CSV, JSON lines or a JSON array
+@product_bp.route('/import', methods=['POST'])
+def import_products_route():
+    upload = request.files.get('file')
+    if upload:
+        payload = upload.read().decode('utf-8-sig')
+        source = (upload.filename or '').lower()
+    else:
+        payload = request.get_data(as_text=True)
+        source = request.mimetype
+
+    if source.endswith('csv'):
+        import_format = 'csv'
+    elif source.endswith(('jsonl', 'ndjson')):
+        import_format = 'jsonl'
+    else:
+        import_format = 'json'
+
+    return import_products(payload, import_format)
+
 # Route to update an existing product
 @product_bp.route('/update/<int:product_id>', methods=['PUT'])
 def update_existing_product(product_id):
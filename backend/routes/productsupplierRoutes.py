@@ -1,6 +1,6 @@
 from app import app
 from flask import Blueprint, request
-from services.productsupplierServices import create_product_supplier, update_product_supplier, get_product_suppliers, toggle_product_supplier_status, delete_product_supplier
+from services.productsupplierServices import create_product_supplier, update_product_supplier, get_product_suppliers, toggle_product_supplier_status, delete_product_supplier, get_best_suppliers, get_price_history
 
 product_supplier_bp = Blueprint('product-suppliers', __name__, url_prefix='/api/product-suppliers')
 
@@ -33,3 +33,13 @@ def toggle_status_product_supplier(product_supplier_id):
 @product_supplier_bp.route('/delete/<int:product_supplier_id>', methods=['DELETE'])
 def delete_product_supplier_route(product_supplier_id):
     return delete_product_supplier(product_supplier_id)
+
+# Route to get the cheapest active supplier and the top-k offers for a product
+@product_supplier_bp.route('/product/<int:product_id>/best', methods=['GET'])
+def fetch_best_suppliers(product_id):
+    return get_best_suppliers(product_id, request.args)
+
+# Route to get the listed price history of a product
+@product_supplier_bp.route('/product/<int:product_id>/price-history', methods=['GET'])
+def fetch_price_history(product_id):
+    return get_price_history(product_id, request.args)
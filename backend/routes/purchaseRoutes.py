@@ -1,13 +1,19 @@
 from flask import Blueprint, request
-from services.purchaseServices import create_purchase_request, get_purchase_requests, get_recent_purchase_requests, delete_purchase_request, get_top_10_products_by_approved_requests
+from services.replenishmentServices import run_replenishment_plan, confirm_draft_purchase_requests
+from services.purchaseServices import create_purchase_request, create_purchase_requests_batch, get_purchase_requests, export_purchase_requests, get_recent_purchase_requests, delete_purchase_request, get_top_products_by_approved_requests
 
 # Create Blueprint for purchase-related routes
 purchase_bp = Blueprint('purchase', __name__, url_prefix='/api/purchase')
 
-# Route to get all products
+# Route to get purchase requests, filtered, sorted and paginated through the query string
 @purchase_bp.route('/', methods=['GET'])
 def fetch_purchase_requests():
-    return get_purchase_requests()
+    return get_purchase_requests(request.args)
+
+# Route to stream all purchase requests as CSV or NDJSON
+@purchase_bp.route('/export', methods=['GET'])
+def export_purchase_requests_route():
+    return export_purchase_requests(request.args)
 
 # Route to get all products
 @purchase_bp.route('/recent', methods=['GET'])
@@ -20,12 +26,27 @@ def create_new_purchase():
     data = request.json 
     return create_purchase_request(data)
 
+# Route to create a multi-line purchase order in one transaction
+@purchase_bp.route('/create-batch', methods=['POST'])
+def create_new_purchase_batch():
+    data = request.json
+    return create_purchase_requests_batch(data)
+
 @purchase_bp.route('/delete/<int:request_id>', methods=['DELETE'])
 def delete_purchase_request_route(request_id):
     return delete_purchase_request(request_id)
 
-# Route to get top 10 products based on the number of approved purchase requests
+# Route to get the top N products (default 10) by approved purchase requests, optionally within a date window
 @purchase_bp.route('/top10approvedproducts', methods=['GET'])
-def fetch_top_10_products_by_approved_requests():
-    return get_top_10_products_by_approved_requests()
+def fetch_top_products_by_approved_requests():
+    return get_top_products_by_approved_requests(request.args)
+
+# Route to plan replenishment for the whole catalog and create draft purchase requests
+@purchase_bp.route('/replenishment-plan', methods=['POST'])
+def create_replenishment_plan():
+    return run_replenishment_plan(request.get_json(silent=True))
 
+# Route to confirm reviewed draft purchase requests as pending orders
+@purchase_bp.route('/drafts/confirm', methods=['POST'])
+def confirm_drafts():
+    return confirm_draft_purchase_requests(request.get_json())
@@ -1,12 +1,16 @@
 from app import app
 from flask import Blueprint, request
+from models.supplier import Supplier
+from utils.etag import etag_collection
 from services.supplierServices import get_suppliers, get_supplier_by_id, create_supplier, update_supplier, delete_supplier
+from services.scorecardServices import get_supplier_scorecards, get_supplier_scorecard
 
 # Create Blueprint for suppliers
 supplier_bp = Blueprint('supplier', __name__, url_prefix='/api/supplier')
 
 # Route to get all suppliers
 @supplier_bp.route('/', methods=['GET'])
+@etag_collection(Supplier.updated_at)
 def fetch_suppliers():
     return get_suppliers()
 
@@ -15,6 +19,16 @@ def fetch_suppliers():
 def fetch_supplier(supplier_id):
     return get_supplier_by_id(supplier_id)
 
+# Route to get the quality scorecard of every supplier
+@supplier_bp.route('/scorecard', methods=['GET'])
+def fetch_supplier_scorecards():
+    return get_supplier_scorecards(request.args)
+
+# Route to get the quality scorecard of a supplier, broken down per product
+@supplier_bp.route('/<int:supplier_id>/scorecard', methods=['GET'])
+def fetch_supplier_scorecard(supplier_id):
+    return get_supplier_scorecard(supplier_id)
+
 # Route to create a new supplier
 @supplier_bp.route('/create', methods=['POST'])
 def create_new_supplier():
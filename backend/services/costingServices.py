@@ -0,0 +1,158 @@
+from flask import current_app, jsonify, make_response
+from decimal import Decimal, ROUND_HALF_UP
+from models.costlayer import CostLayer
+from models.inventory import Inventory
+from models.products import Product
+from app import db
+from sqlalchemy import case, func, update
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+
+COSTING_METHODS = ('average', 'fifo')
+CENT = Decimal('0.01')
+
+def costing_method():
+    method = current_app.config.get('INVENTORY_COSTING_METHOD', 'average')
+    if method not in COSTING_METHODS:
+        raise ValueError(f"Unknown inventory costing method '{method}'")
+    return method
+
+def _to_cents(amount):
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+# Record received stock at its unit cost and return the amount it adds to running_amount.
+# The caller adds the quantity and amount to the inventory row in the same transaction.
+def record_receipt(product_id, quantity, unit_cost):
+    if costing_method() == 'fifo':
+        db.session.add(CostLayer(
+            product_id=product_id,
+            unit_cost=unit_cost,
+            quantity_received=quantity,
+            quantity_remaining=quantity
+        ))
+    return _to_cents(Decimal(unit_cost) * quantity)
+
+# Consume FIFO layers oldest first. Each layer is emptied at most once, so the total
+# work over the life of a product is proportional to its receipts (amortized O(1)).
+def _consume_layers(product_id, quantity):
+    cost = Decimal('0')
+    layers = CostLayer.query\
+        .filter(CostLayer.product_id == product_id, CostLayer.quantity_remaining > 0)\
+        .order_by(CostLayer.layer_id)\
+        .yield_per(20)
+
+    for layer in layers:
+        if quantity == 0:
+            break
+        taken = min(layer.quantity_remaining, quantity)
+        layer.quantity_remaining -= taken
+        quantity -= taken
+        cost += layer.unit_cost * taken
+
+    # Whatever is left is more than the layers hold; the caller values it at average cost
+    return cost, quantity
+
+# Stock on hand that no open layer accounts for predates FIFO layering, so it is the oldest.
+# Returns its (quantity, value): what the open layers do not explain of the inventory row.
+def _opening_stock(product_id, on_hand, running_amount):
+    layered_quantity, layered_value = db.session.query(
+        func.coalesce(func.sum(CostLayer.quantity_remaining), 0),
+        func.coalesce(func.sum(CostLayer.quantity_remaining * CostLayer.unit_cost), 0)
+    ).filter(CostLayer.product_id == product_id, CostLayer.quantity_remaining > 0).one()
+
+    opening_quantity = max(on_hand - layered_quantity, 0)
+    if opening_quantity == 0:
+        return 0, Decimal('0')
+    return opening_quantity, max(running_amount - Decimal(layered_value), Decimal('0'))
+
+# Lower running_amount for stock just taken by inventoryServices.reserve_stock.
+# reserved maps product_id to (new quantity, reorder threshold) and quantities maps
+# product_id to the quantity issued. Returns {product_id: cost of the issued stock}.
+def apply_issue_costs(reserved, quantities):
+    if not reserved:
+        return {}
+
+    # The inventory rows were locked by the reserving UPDATE, so these amounts are stable
+    running_amounts = dict(
+        db.session.query(Inventory.product_id, Inventory.running_amount)
+        .filter(Inventory.product_id.in_(list(reserved)))
+    )
+
+    method = costing_method()
+    costs = {}
+    for product_id, (quantity, _) in reserved.items():
+        issued = quantities[product_id]
+        running_amount = running_amounts[product_id]
+        previous_quantity = quantity + issued
+
+        if method == 'fifo':
+            # Opening stock goes first, at its own average cost, then the layers oldest first
+            opening_quantity, opening_value = _opening_stock(product_id, previous_quantity, running_amount)
+            from_opening = min(issued, opening_quantity)
+            cost, unlayered = _consume_layers(product_id, issued - from_opening)
+            if from_opening:
+                cost += opening_value * from_opening / opening_quantity
+        else:
+            cost, unlayered = Decimal('0'), issued
+
+        if unlayered:
+            cost += running_amount * unlayered / previous_quantity
+
+        # Issuing the last unit always clears the remaining value, so rounding never drifts
+        costs[product_id] = running_amount if quantity == 0 else min(_to_cents(cost), running_amount)
+
+    db.session.execute(
+        update(Inventory)
+        .where(Inventory.product_id.in_(list(costs)))
+        .values(running_amount=Inventory.running_amount - case(costs, value=Inventory.product_id)),
+        execution_options={'synchronize_session': False}
+    )
+
+    return costs
+
+# Service function to value the inventory from the maintained running amounts
+def get_inventory_valuation(args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        total_quantity, total_value = db.session.query(
+            func.coalesce(func.sum(Inventory.quantity), 0),
+            func.coalesce(func.sum(Inventory.running_amount), 0)
+        ).one()
+
+        query = db.session.query(
+            Inventory.product_id,
+            Product.name,
+            Inventory.quantity,
+            Inventory.running_amount
+        ).join(Product, Inventory.product_id == Product.product_id)
+        if cursor is not None:
+            query = query.filter(Inventory.product_id > cursor)
+
+        rows = query.order_by(Inventory.product_id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        response_data = {
+            'costing_method': costing_method(),
+            'total_quantity': int(total_quantity),
+            'total_value': str(_to_cents(total_value)),
+            'products': [
+                {
+                    'product_id': product_id,
+                    'product_name': name,
+                    'quantity': quantity,
+                    'value': str(running_amount),
+                    'average_unit_cost': str(_to_cents(running_amount / quantity)) if quantity else '0.00'
+                }
+                for product_id, name, quantity, running_amount in rows
+            ],
+            'next_cursor': encode_cursor(rows[-1].product_id) if has_more else None
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
@@ -1,45 +1,84 @@
 from flask import jsonify, make_response
-from models.damage import DamagedItem
+from models.damage import DamagedItem, ReturnStatusEnum
+from models.evaluate import Evaluation
+from models.purchase import PurchaseRequest
 from models.inventory import Inventory
+from models.inventorymovement import MovementType
+from services.inventoryledgerServices import record_movement, record_movements
+from services.costingServices import record_receipt
+from services.scorecardServices import invalidate_supplier_scorecards
 from app import db
+from datetime import datetime
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import joinedload
+from utils.cache import report_cache
+from utils.pagination import parse_limit, parse_int_arg, encode_cursor, decode_cursor
+from utils.dates import parse_datetime_arg
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
 
 # Service function to update a damaged item's status and inventory
 def update_damage_status(damaged_item_id):
     try:
-        # Fetch the damaged item by ID
-        damaged_item = DamagedItem.query.get(damaged_item_id)
+        # Fetch and lock the damaged item, so a concurrent replacement cannot restock it twice
+        damaged_item = DamagedItem.query\
+            .filter(DamagedItem.damaged_item_id == damaged_item_id)\
+            .with_for_update()\
+            .first()
         if not damaged_item:
+            db.session.rollback()
             return make_response(jsonify({"error": "Damaged item not found"}), 404)
 
         # Ensure the damaged item's status is not already replaced
-        if damaged_item.return_status == "replaced":
+        if damaged_item.return_status == ReturnStatusEnum.replaced:
+            db.session.rollback()
             return make_response(jsonify({"error": "Damaged item already replaced"}), 400)
 
         # Fetch the related purchase request to get unit_price
         purchase_request = damaged_item.evaluation.purchase_request
         if not purchase_request:
+            db.session.rollback()
             return make_response(jsonify({"error": "Purchase request not found"}), 404)
 
         unit_price = purchase_request.unit_price
 
-        # Fetch the inventory record for the product
-        inventory = Inventory.query.filter_by(product_id=damaged_item.product_id).first()
-        if not inventory:
-            return make_response(jsonify({"error": "Inventory record not found"}), 404)
-
         # Calculate the total amount for the damaged items
-        total_amount = unit_price * damaged_item.quantity
+        total_amount = record_receipt(damaged_item.product_id, damaged_item.quantity, unit_price)
 
-        # Update inventory
-        inventory.quantity += damaged_item.quantity
-        inventory.running_amount += total_amount
+        # Restock with one atomic UPDATE so a concurrent reservation's decrement is not overwritten
+        inventory_id = db.session.execute(
+            update(Inventory)
+            .where(Inventory.product_id == damaged_item.product_id)
+            .values(
+                quantity=Inventory.quantity + damaged_item.quantity,
+                running_amount=Inventory.running_amount + total_amount,
+                updated_at=datetime.now(MANILA_TZ)
+            )
+            .returning(Inventory.inventory_id),
+            execution_options={'synchronize_session': False}
+        ).scalar()
+        if inventory_id is None:
+            db.session.rollback()
+            return make_response(jsonify({"error": "Inventory record not found"}), 404)
+
+        record_movement(
+            damaged_item.product_id,
+            MovementType.replacement,
+            damaged_item.quantity,
+            total_amount,
+            reference_id=damaged_item.damaged_item_id
+        )
 
         # Update the damaged item's status to replaced
-        damaged_item.return_status = "replaced"
+        damaged_item.return_status = ReturnStatusEnum.replaced
 
         # Commit the changes
         db.session.commit()
+        invalidate_supplier_scorecards(purchase_request.supplier_id)
+        report_cache.clear()
 
+        inventory = Inventory.query.get(inventory_id)
         return make_response(
             jsonify({
                 "message": "Damaged item status updated and inventory adjusted",
@@ -52,20 +91,171 @@ def update_damage_status(damaged_item_id):
         db.session.rollback()
         return make_response(jsonify({"error": str(e)}), 500)
 
+# Service function to mark many damaged items replaced and restock them in one transaction
+def replace_damaged_items_batch(data):
+    try:
+        damaged_item_ids = (data or {}).get('damaged_item_ids')
+        if not damaged_item_ids or not isinstance(damaged_item_ids, list):
+            return make_response(jsonify({"error": "damaged_item_ids must be a non-empty list"}), 400)
+        if not all(isinstance(damaged_item_id, int) and not isinstance(damaged_item_id, bool) for damaged_item_id in damaged_item_ids):
+            return make_response(jsonify({"error": "damaged_item_ids must be integers"}), 400)
+        damaged_item_ids = list(dict.fromkeys(damaged_item_ids))
+
+        # Lock the damaged items and read their purchase prices in one query,
+        # so a concurrent replacement cannot restock the same item twice
+        rows = {
+            row.damaged_item_id: row
+            for row in db.session.query(
+                DamagedItem.damaged_item_id,
+                DamagedItem.product_id,
+                DamagedItem.quantity,
+                DamagedItem.return_status,
+                PurchaseRequest.unit_price,
+                PurchaseRequest.supplier_id
+            ).join(Evaluation, DamagedItem.evaluation_id == Evaluation.evaluation_id)
+            .join(PurchaseRequest, Evaluation.request_id == PurchaseRequest.request_id)
+            .filter(DamagedItem.damaged_item_id.in_(damaged_item_ids))
+            .with_for_update(of=DamagedItem)
+            .all()
+        }
+        stocked = {
+            product_id for (product_id,) in
+            db.session.query(Inventory.product_id)
+            .filter(Inventory.product_id.in_({row.product_id for row in rows.values()}))
+        }
+
+        errors = []
+        for damaged_item_id in damaged_item_ids:
+            row = rows.get(damaged_item_id)
+            if not row:
+                errors.append({"damaged_item_id": damaged_item_id, "error": "Damaged item not found"})
+            elif row.return_status == ReturnStatusEnum.replaced:
+                errors.append({"damaged_item_id": damaged_item_id, "error": "Damaged item already replaced"})
+            elif row.product_id not in stocked:
+                errors.append({"damaged_item_id": damaged_item_id, "error": "Inventory record not found"})
 
-def get_damages():
-    damaged_items = DamagedItem.query.all()
-    damaged_items_list = [damaged_item.to_dict() for damaged_item in damaged_items]
-    total_damages = len(damaged_items)
+        if errors:
+            db.session.rollback()
+            return make_response(jsonify({"error": "Damaged items could not be replaced", "details": errors}), 400)
 
-    pending_damages = DamagedItem.query.filter_by(return_status='pending').all()
-    total_pending_damages = len(pending_damages)
+        # Total the replacements per product so each inventory row is updated once
+        replaced_quantities = {}
+        replaced_amounts = {}
+        movements = []
+        for damaged_item_id in damaged_item_ids:
+            row = rows[damaged_item_id]
+            total_amount = record_receipt(row.product_id, row.quantity, row.unit_price)
+            replaced_quantities[row.product_id] = replaced_quantities.get(row.product_id, 0) + row.quantity
+            replaced_amounts[row.product_id] = replaced_amounts.get(row.product_id, 0) + total_amount
+            movements.append({
+                "product_id": row.product_id,
+                "movement_type": MovementType.replacement,
+                "quantity_change": row.quantity,
+                "amount_change": total_amount,
+                "reference_id": damaged_item_id
+            })
 
-    # Prepare the response data
-    response_data = {
-        "total_damages": total_damages,
-        "total_pending_damages": total_pending_damages,
-        "damaged_items": damaged_items_list
-    }
+        changed = {
+            product_id: (quantity, reorder_threshold)
+            for product_id, quantity, reorder_threshold in db.session.execute(
+                update(Inventory)
+                .where(Inventory.product_id.in_(list(replaced_quantities)))
+                .values(
+                    quantity=Inventory.quantity + case(replaced_quantities, value=Inventory.product_id),
+                    running_amount=Inventory.running_amount + case(replaced_amounts, value=Inventory.product_id),
+                    updated_at=datetime.now(MANILA_TZ)
+                )
+                .returning(Inventory.product_id, Inventory.quantity, Inventory.reorder_threshold),
+                execution_options={"synchronize_session": False}
+            )
+        }
 
-    return make_response(jsonify(response_data), 200)
\ No newline at end of file
+        db.session.execute(
+            update(DamagedItem)
+            .where(DamagedItem.damaged_item_id.in_(damaged_item_ids))
+            .values(return_status=ReturnStatusEnum.replaced, updated_at=datetime.now(MANILA_TZ)),
+            execution_options={"synchronize_session": False}
+        )
+        record_movements(movements)
+
+        db.session.commit()
+        invalidate_supplier_scorecards(*{row.supplier_id for row in rows.values()})
+        report_cache.clear()
+
+        response_data = {
+            "replaced": damaged_item_ids,
+            "updated_inventory": [
+                {"product_id": product_id, "quantity": quantity, "replaced_quantity": replaced_quantities[product_id]}
+                for product_id, (quantity, _) in sorted(changed.items())
+            ]
+        }
+
+        return make_response(jsonify({"message": "Damaged items replaced and inventory adjusted", "data": response_data}), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({"error": str(e)}), 500)
+
+def _filter_damages(query, args):
+    product_id = parse_int_arg(args, 'product_id')
+    if product_id is not None:
+        query = query.filter(DamagedItem.product_id == product_id)
+
+    start_date = parse_datetime_arg(args.get('start_date'), 'start_date')
+    if start_date:
+        query = query.filter(DamagedItem.created_at >= start_date)
+
+    end_date = parse_datetime_arg(args.get('end_date'), 'end_date')
+    if end_date:
+        query = query.filter(DamagedItem.created_at <= end_date)
+
+    return query
+
+# Service function to get one page of damaged items with per-status counts
+def get_damages(args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        status = args.get('status')
+        if status and status not in [item.value for item in ReturnStatusEnum]:
+            raise ValueError('Invalid status')
+
+        # Counts honour the product and date filters but not status, so every status is reported
+        status_counts = dict.fromkeys([item.value for item in ReturnStatusEnum], 0)
+        counts = _filter_damages(
+            db.session.query(DamagedItem.return_status, func.count(DamagedItem.damaged_item_id)),
+            args
+        ).group_by(DamagedItem.return_status).all()
+        for return_status, count in counts:
+            status_counts[return_status.value] = count
+
+        query = _filter_damages(DamagedItem.query.options(joinedload(DamagedItem.product)), args)
+        if status:
+            query = query.filter(DamagedItem.return_status == ReturnStatusEnum(status))
+        if cursor is not None:
+            query = query.filter(DamagedItem.damaged_item_id > cursor)
+
+        damaged_items = query.order_by(DamagedItem.damaged_item_id).limit(limit + 1).all()
+        has_more = len(damaged_items) > limit
+        damaged_items = damaged_items[:limit]
+
+        # Prepare the response data
+        response_data = {
+            "total_damages": sum(status_counts.values()),
+            "total_pending_damages": status_counts[ReturnStatusEnum.pending.value],
+            "status_counts": status_counts,
+            "damaged_items": [damaged_item.to_dict() for damaged_item in damaged_items],
+            "next_cursor": encode_cursor(damaged_items[-1].damaged_item_id) if has_more else None
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({"error": str(e)}), 500)
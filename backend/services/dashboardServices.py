@@ -0,0 +1,36 @@
+from flask import jsonify, make_response
+from models.inventory import Inventory
+from models.supplier import Supplier
+from models.damage import DamagedItem, ReturnStatusEnum
+from models.maintenance import Maintenance, MaintenanceStatus
+from models.purchase import PurchaseRequest, PurchaseRequestStatusEnum
+from app import db
+from sqlalchemy import func, select
+from utils.cache import report_cache
+
+def _count(column, *criteria):
+    return select(func.count(column)).where(*criteria).scalar_subquery()
+
+# Every dashboard counter as a scalar subquery of one SELECT, so a single round trip computes them all
+def _dashboard_summary():
+    summary = db.session.execute(select(
+        select(func.coalesce(func.sum(Inventory.quantity), 0)).scalar_subquery().label('total_quantity'),
+        _count(Inventory.inventory_id, Inventory.quantity - Inventory.reorder_threshold < 0).label('low_stock_items'),
+        _count(Supplier.supplier_id).label('total_suppliers'),
+        _count(DamagedItem.damaged_item_id).label('total_damages'),
+        _count(DamagedItem.damaged_item_id, DamagedItem.return_status == ReturnStatusEnum.pending).label('total_pending_damages'),
+        _count(Maintenance.maintenance_id).label('total_maintenance'),
+        _count(Maintenance.maintenance_id, Maintenance.status == MaintenanceStatus.condemned).label('total_condemned'),
+        _count(PurchaseRequest.request_id, PurchaseRequest.status == PurchaseRequestStatusEnum.pending).label('pending_purchase_requests')
+    )).one()
+
+    return {name: int(value) for name, value in summary._mapping.items()}
+
+# Service function to get the dashboard headline counters
+def get_dashboard_summary():
+    try:
+        summary = report_cache.get_or_load('dashboard_summary', _dashboard_summary)
+        return make_response(jsonify(summary), 200)
+
+    except Exception as e:
+        return make_response(jsonify({'error': str(e)}), 500)
@@ -1,12 +1,14 @@
 from flask import request, jsonify, make_response
 from models.department import DepartmentFacility
 from app import db
+from utils.cache import reference_cache
 
 # Get all departments
 def get_departments():
-    departments = DepartmentFacility.query.all()
-    department_list = [department.to_dict() for department in departments]
-    
+    department_list = reference_cache.get_or_load('departments', lambda: [
+        department.to_dict() for department in DepartmentFacility.query.all()
+    ])
+
     return make_response(jsonify(department_list), 200)
 
 # Service function to get a single department by ID
@@ -34,6 +36,7 @@ def create_department(data):
         new_department = DepartmentFacility(department_name=name)
         db.session.add(new_department)
         db.session.commit()
+        reference_cache.invalidate('departments')
         
         department_response = {
             'department_id': new_department.department_id,
@@ -70,6 +73,7 @@ def update_department(department_id, data):
         
         department.department_name = name
         db.session.commit()
+        reference_cache.invalidate('departments')
         
         department_response = {
             'department_id': department.department_id,
@@ -95,6 +99,7 @@ def delete_department(department_id):
         
         db.session.delete(department)
         db.session.commit()
+        reference_cache.invalidate('departments')
 
         return jsonify({'message': 'Department deleted successfully'}), 200
 
@@ -3,9 +3,26 @@ from models.departmentrequest import DepartmentRequest
 from models.inventory import Inventory
 from models.department import DepartmentFacility
 from models.products import Product
+from models.inventorymovement import MovementType
+from services.inventoryServices import reserve_stock
+from services.inventoryledgerServices import record_movement, record_movements
+from services.costingServices import apply_issue_costs
 from app import db
 from datetime import datetime
-from sqlalchemy import func
+from decimal import Decimal
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import joinedload
+from utils.cache import report_cache
+from utils.pagination import parse_limit
+from utils.dates import parse_datetime_arg
+
+# Parse a positive integer quantity or id from the request body, or None if it is not one
+def _parse_positive_int(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
 
 def create_department_request():
     try:
@@ -18,15 +35,29 @@ def create_department_request():
         if not (department_id and product_id and quantity):
             return make_response(jsonify({"error": "Missing required fields"}), 400)
 
-        # Fetch the inventory record
-        inventory = Inventory.query.filter_by(product_id=product_id).first()
+        quantity = _parse_positive_int(quantity)
+        if quantity is None:
+            return make_response(jsonify({"error": "Quantity must be a positive integer"}), 400)
+
+        # reserve_stock keys its result by the integer product_id
+        product_id = _parse_positive_int(product_id)
+        if product_id is None:
+            return make_response(jsonify({"error": "Product ID must be a positive integer"}), 400)
 
-        if not inventory:
+        # Decrease the inventory only if enough stock remains
+        reserved, failures = reserve_stock({product_id: quantity})
+
+        if failures.get(product_id) == 'not_found':
+            db.session.rollback()
             return make_response(jsonify({"error": f"No inventory record found for product_id {product_id}"}), 404)
 
-        if inventory.quantity < quantity:
+        if failures:
+            db.session.rollback()
             return make_response(jsonify({"error": "Insufficient inventory"}), 400)
 
+        # Take the issued stock's cost out of the running amount
+        costs = apply_issue_costs(reserved, {product_id: quantity})
+
         # Create the new department request
         new_request = DepartmentRequest(
             department_id=department_id,
@@ -35,14 +66,13 @@ def create_department_request():
             request_date=datetime.now()
         )
 
-        # Decrease the inventory
-        inventory.quantity -= quantity
-        inventory.updated_at = datetime.now()
-
-        # Add the new request and update the inventory in the database
+        # Add the new request in the same transaction as the stock decrement
         db.session.add(new_request)
-        db.session.add(inventory)
+        db.session.flush()  # Flush so department_request_id is available for the ledger
+
+        record_movement(product_id, MovementType.issue, -quantity, -costs[product_id], reference_id=new_request.department_request_id)
         db.session.commit()
+        report_cache.clear()
 
         return make_response(jsonify(new_request.to_dict()), 201)
 
@@ -53,6 +83,106 @@ def create_department_request():
     finally:
         db.session.remove()
 
+# Create a multi-line requisition: every line is filled in one transaction, or none is
+def create_department_requests_batch():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return make_response(jsonify({"error": "Request body must be a JSON object"}), 400)
+
+        department_id = _parse_positive_int(data.get('department_id'))
+        items = data.get('items')
+
+        if not department_id or not isinstance(items, list) or not items:
+            return make_response(jsonify({"error": "A valid department ID and a non-empty list of items are required"}), 400)
+
+        if not DepartmentFacility.query.get(department_id):
+            return make_response(jsonify({"error": "Department not found"}), 404)
+
+        # Validate every line and total the quantities per product
+        errors = []
+        lines = []
+        quantities = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"line": index, "error": "Each item must be an object"})
+                continue
+            product_id = _parse_positive_int(item.get('product_id'))
+            quantity = _parse_positive_int(item.get('quantity'))
+            if not product_id or quantity is None:
+                errors.append({"line": index, "error": "Product ID and a positive integer quantity are required"})
+                continue
+            lines.append((product_id, quantity))
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        if errors:
+            return make_response(jsonify({"error": "Invalid requisition lines", "details": errors}), 400)
+
+        # One conditional UPDATE reserves stock for every product at once
+        reserved, failures = reserve_stock(quantities)
+        if failures:
+            db.session.rollback()
+            details = [
+                {"product_id": product_id, "error": "No inventory record found" if reason == 'not_found' else "Insufficient inventory"}
+                for product_id, reason in failures.items()
+            ]
+            return make_response(jsonify({"error": "Requisition could not be filled", "details": details}), 400)
+
+        costs = apply_issue_costs(reserved, quantities)
+
+        request_date = datetime.now()
+        request_ids = db.session.execute(
+            insert(DepartmentRequest).returning(DepartmentRequest.department_request_id, sort_by_parameter_order=True),
+            [
+                {
+                    "department_id": department_id,
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "request_date": request_date
+                }
+                for product_id, quantity in lines
+            ]
+        ).scalars().all()
+
+        # Split each product's issue cost across its lines; the last line takes the rounding remainder
+        remaining_quantities = dict(quantities)
+        remaining_costs = dict(costs)
+        movements = []
+        for (product_id, quantity), request_id in zip(lines, request_ids):
+            if quantity == remaining_quantities[product_id]:
+                line_cost = remaining_costs[product_id]
+            else:
+                line_cost = (remaining_costs[product_id] * quantity / remaining_quantities[product_id]).quantize(Decimal('0.01'))
+            remaining_quantities[product_id] -= quantity
+            remaining_costs[product_id] -= line_cost
+
+            movements.append({
+                "product_id": product_id,
+                "movement_type": MovementType.issue,
+                "quantity_change": -quantity,
+                "amount_change": -line_cost,
+                "reference_id": request_id
+            })
+
+        record_movements(movements)
+        db.session.commit()
+        report_cache.clear()
+
+        department_requests = DepartmentRequest.query\
+            .options(joinedload(DepartmentRequest.department), joinedload(DepartmentRequest.product))\
+            .filter(DepartmentRequest.department_request_id.in_(request_ids))\
+            .order_by(DepartmentRequest.department_request_id)\
+            .all()
+
+        return make_response(jsonify([department_request.to_dict() for department_request in department_requests]), 201)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({"error": str(e)}), 500)
+
+    finally:
+        db.session.remove()
+
 # Get all department requests
 def get_department_requests():
     # Fetch all department requests from the database
@@ -60,31 +190,67 @@ def get_department_requests():
     department_request_list = [request.to_dict() for request in department_requests]
     return make_response(jsonify(department_request_list), 200)
 
-def get_top_purchases_per_department():
+def _top_purchases_per_department(limit, start_date, end_date):
+    total_purchases = func.sum(DepartmentRequest.quantity)
+    totals = select(
+        DepartmentRequest.department_id,
+        DepartmentRequest.product_id,
+        total_purchases.label('total_purchases'),
+        func.row_number().over(
+            partition_by=DepartmentRequest.department_id,
+            order_by=(total_purchases.desc(), DepartmentRequest.product_id)
+        ).label('rank')
+    )
+    if start_date:
+        totals = totals.where(DepartmentRequest.request_date >= start_date)
+    if end_date:
+        totals = totals.where(DepartmentRequest.request_date <= end_date)
+    totals = totals.group_by(DepartmentRequest.department_id, DepartmentRequest.product_id).subquery()
+
+    # Rank within each department, then keep the top rows of every department
+    top_purchases = db.session.query(
+        totals.c.department_id,
+        DepartmentFacility.department_name,
+        totals.c.product_id,
+        Product.name.label('product_name'),
+        totals.c.total_purchases,
+        totals.c.rank
+    ).join(DepartmentFacility, DepartmentFacility.department_id == totals.c.department_id)\
+        .join(Product, Product.product_id == totals.c.product_id)\
+        .filter(totals.c.rank <= limit)\
+        .order_by(DepartmentFacility.department_name, totals.c.rank)\
+        .all()
+
+    return [
+        {
+            'department_id': purchase.department_id,
+            'department_name': purchase.department_name,
+            'product_id': purchase.product_id,
+            'product_name': purchase.product_name,
+            'total_purchases': int(purchase.total_purchases),
+            'rank': purchase.rank
+        }
+        for purchase in top_purchases
+    ]
+
+# Top N products by quantity requested in every department, optionally within a date range
+def get_top_purchases_per_department(args):
     try:
-        # Query to aggregate and fetch top 10 purchases per department
-        top_purchases = db.session.query(
-            DepartmentFacility.department_name,
-            Product.name.label('product_name'),
-            func.sum(DepartmentRequest.quantity).label('total_purchases')
-        ).join(DepartmentRequest, DepartmentFacility.department_id == DepartmentRequest.department_id
-        ).join(Product, DepartmentRequest.product_id == Product.product_id
-        ).group_by(DepartmentFacility.department_name, Product.name
-        ).order_by(DepartmentFacility.department_name, func.sum(DepartmentRequest.quantity).desc()
-        ).limit(5).all()  # Limit the results to top 10
-
-        # Convert the query result to a list of dictionaries
-        top_purchases_list = [
-            {
-                'department_name': purchase.department_name,
-                'product_name': purchase.product_name,
-                'total_purchases': purchase.total_purchases
-            }
-            for purchase in top_purchases
-        ]
+        limit = parse_limit(args, default=5, maximum=50)
+        start_date = parse_datetime_arg(args.get('start_date'), 'start_date')
+        end_date = parse_datetime_arg(args.get('end_date'), 'end_date')
+
+        cache_key = ('top_purchases_per_department', limit, start_date, end_date)
+        top_purchases_list = report_cache.get_or_load(
+            cache_key,
+            lambda: _top_purchases_per_department(limit, start_date, end_date)
+        )
 
         return make_response(jsonify(top_purchases_list), 200)
 
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
     except Exception as e:
         return make_response(jsonify({"error": str(e)}), 500)
 
@@ -1,25 +1,55 @@
 from flask import jsonify, make_response
 from models.purchase import PurchaseRequest, PurchaseRequestStatusEnum
+from models.purchaserollup import apply_approval_deltas, approval_key
 from models.evaluate import Evaluation
 from models.damage import DamagedItem, ReturnStatusEnum
 from models.inventory import Inventory
 from models.products import Product
+from models.inventorymovement import MovementType
+from services.inventoryledgerServices import record_movement, record_movements
+from services.costingServices import record_receipt
+from services.scorecardServices import invalidate_supplier_scorecards
+from utils.cache import report_cache
+from models.supplier import Supplier
 from app import db
+from datetime import datetime
+from sqlalchemy import case, insert, select, update
+from utils.export import stream_export
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
 
 def evaluate_purchase_request(request_id, undamaged_quantity, damaged_quantity):
     try:
-        # Fetch the purchase request by request_id
-        purchase_request = PurchaseRequest.query.get(request_id)
+        if not all(isinstance(value, int) and not isinstance(value, bool) and value >= 0
+                   for value in (undamaged_quantity, damaged_quantity)):
+            return make_response(jsonify({'error': 'Undamaged and damaged quantities must be non-negative integers'}), 400)
+
+        # Fetch and lock the purchase request so a concurrent evaluation cannot receive it twice
+        purchase_request = PurchaseRequest.query\
+            .filter(PurchaseRequest.request_id == request_id)\
+            .with_for_update()\
+            .first()
 
         # Check if the purchase request exists
         if not purchase_request:
+            db.session.rollback()
             return make_response(jsonify({'error': 'Purchase request not found'}), 404)
 
+        # Only a pending request can be evaluated, as in the batch path; drafts must be confirmed first
+        if purchase_request.status == PurchaseRequestStatusEnum.draft:
+            db.session.rollback()
+            return make_response(jsonify({'error': 'Draft purchase requests must be confirmed before evaluation'}), 400)
+        if purchase_request.status != PurchaseRequestStatusEnum.pending:
+            db.session.rollback()
+            return make_response(jsonify({'error': 'Purchase request has already been evaluated'}), 400)
+
         unit_price = purchase_request.unit_price
 
         # Ensure that the sum of undamaged and damaged quantities matches the total request quantity
         total_quantity = undamaged_quantity + damaged_quantity
         if total_quantity != purchase_request.quantity:
+            db.session.rollback()
             return make_response(jsonify({'error': 'Undamaged and damaged quantities must sum up to the total requested quantity'}), 400)
 
         # Evaluate based on damaged and undamaged quantities
@@ -31,7 +61,7 @@ def evaluate_purchase_request(request_id, undamaged_quantity, damaged_quantity):
                 damaged_quantity=damaged_quantity
             )
             db.session.add(evaluation)
-            db.session.commit()  # Commit so evaluation_id is available
+            db.session.flush()  # Flush so evaluation_id is available
 
             # If there's damage, save the damaged products to DamagedItem
             damaged_item = DamagedItem(
@@ -53,39 +83,54 @@ def evaluate_purchase_request(request_id, undamaged_quantity, damaged_quantity):
                 damaged_quantity=0
             )
             db.session.add(evaluation)
-            db.session.commit()
-            
+            db.session.flush()
+
             # Update the PurchaseRequest status to "approved"
             purchase_request.status = PurchaseRequestStatusEnum.approved
 
         # Logic to add undamaged items to inventory
         if undamaged_quantity > 0:
-            inventory_item = Inventory.query.filter_by(product_id=purchase_request.product_id).first()
+            receipt_amount = record_receipt(purchase_request.product_id, undamaged_quantity, unit_price)
 
-            if inventory_item:
-                # Update existing inventory item
-                inventory_item.quantity += undamaged_quantity
-                inventory_item.running_amount += undamaged_quantity * unit_price
-            else:
+            # Receive with one atomic UPDATE so a concurrent reservation's decrement is not overwritten
+            received = db.session.execute(
+                update(Inventory)
+                .where(Inventory.product_id == purchase_request.product_id)
+                .values(
+                    quantity=Inventory.quantity + undamaged_quantity,
+                    running_amount=Inventory.running_amount + receipt_amount,
+                    updated_at=datetime.now(MANILA_TZ)
+                )
+                .returning(Inventory.inventory_id),
+                execution_options={'synchronize_session': False}
+            ).scalar()
+
+            if received is None:
                 # Create a new inventory item
-                inventory_item = Inventory(
+                db.session.add(Inventory(
                     product_id=purchase_request.product_id,
                     quantity=undamaged_quantity,
-                    running_amount=undamaged_quantity * unit_price
-                )
-                db.session.add(inventory_item)
+                    running_amount=receipt_amount
+                ))
+
+            record_movement(
+                purchase_request.product_id,
+                MovementType.receipt,
+                undamaged_quantity,
+                receipt_amount,
+                reference_id=evaluation.evaluation_id
+            )
 
         # If all items are damaged, update the PurchaseRequest status to "rejected"
         if damaged_quantity == purchase_request.quantity:
             purchase_request.status = PurchaseRequestStatusEnum.rejected
-            # Add logic to mark all damaged items as rejected or returned
-            damaged_items = DamagedItem.query.filter_by(evaluation_id=evaluation.evaluation_id).all()
-            for damaged_item in damaged_items:
-                damaged_item.return_status = ReturnStatusEnum.rejected
-                db.session.add(damaged_item)
+            # Mark the damaged items created above as rejected
+            damaged_item.return_status = ReturnStatusEnum.rejected
 
-        # Commit all changes to the database
+        # Commit the evaluation, damaged items and inventory change together
         db.session.commit()
+        invalidate_supplier_scorecards(purchase_request.supplier_id)
+        report_cache.clear()
 
         # Prepare the response data
         response_data = {
@@ -105,7 +150,209 @@ def evaluate_purchase_request(request_id, undamaged_quantity, damaged_quantity):
         return make_response(jsonify({'error': str(e)}), 500)
 
 
-    
+
+# Service function to evaluate many delivered purchase requests in one transaction.
+# Expects {"evaluations": [{"request_id", "undamaged_quantity", "damaged_quantity"}, ...]}.
+def evaluate_purchase_requests_batch(data):
+    try:
+        if not isinstance(data, dict):
+            return make_response(jsonify({'error': 'Request body must be a JSON object'}), 400)
+
+        lines = data.get('evaluations')
+        if not lines or not isinstance(lines, list):
+            return make_response(jsonify({'error': 'evaluations must be a non-empty list'}), 400)
+
+        errors = []
+        evaluations = {}
+        for index, line in enumerate(lines):
+            if not isinstance(line, dict):
+                errors.append({'line': index, 'error': 'Each evaluation must be an object'})
+                continue
+            request_id = line.get('request_id')
+            undamaged_quantity = line.get('undamaged_quantity')
+            damaged_quantity = line.get('damaged_quantity')
+            if not isinstance(request_id, int) or isinstance(request_id, bool):
+                errors.append({'line': index, 'error': 'Request ID is required'})
+            elif not all(isinstance(value, int) and not isinstance(value, bool) and value >= 0
+                         for value in (undamaged_quantity, damaged_quantity)):
+                errors.append({'line': index, 'error': 'Undamaged and damaged quantities must be non-negative integers'})
+            elif request_id in evaluations:
+                errors.append({'line': index, 'error': 'Purchase request appears more than once'})
+            else:
+                evaluations[request_id] = (undamaged_quantity, damaged_quantity)
+
+        if errors:
+            return make_response(jsonify({'error': 'Invalid evaluation lines', 'details': errors}), 400)
+
+        # Lock every purchase request in the batch so a concurrent evaluation cannot receive it twice
+        locked_requests = PurchaseRequest.query\
+            .filter(PurchaseRequest.request_id.in_(list(evaluations)))\
+            .with_for_update()\
+            .all()
+        purchase_requests = {purchase_request.request_id: purchase_request for purchase_request in locked_requests}
+
+        for request_id, (undamaged_quantity, damaged_quantity) in evaluations.items():
+            purchase_request = purchase_requests.get(request_id)
+            if not purchase_request:
+                errors.append({'request_id': request_id, 'error': 'Purchase request not found'})
+            elif purchase_request.status == PurchaseRequestStatusEnum.draft:
+                errors.append({'request_id': request_id, 'error': 'Draft purchase requests must be confirmed before evaluation'})
+            elif purchase_request.status != PurchaseRequestStatusEnum.pending:
+                errors.append({'request_id': request_id, 'error': 'Purchase request has already been evaluated'})
+            elif undamaged_quantity + damaged_quantity != purchase_request.quantity:
+                errors.append({'request_id': request_id, 'error': 'Undamaged and damaged quantities must sum up to the total requested quantity'})
+
+        if errors:
+            db.session.rollback()
+            return make_response(jsonify({'error': 'Purchase requests could not be evaluated', 'details': errors}), 400)
+
+        request_ids = list(evaluations)
+        evaluation_ids = db.session.execute(
+            insert(Evaluation).returning(Evaluation.evaluation_id, sort_by_parameter_order=True),
+            [
+                {
+                    'request_id': request_id,
+                    'undamaged_quantity': evaluations[request_id][0],
+                    'damaged_quantity': evaluations[request_id][1]
+                }
+                for request_id in request_ids
+            ]
+        ).scalars().all()
+        evaluation_ids = dict(zip(request_ids, evaluation_ids))
+
+        # A delivery that arrived entirely damaged is rejected along with its damaged items
+        rejected = {
+            request_id for request_id, (_, damaged_quantity) in evaluations.items()
+            if damaged_quantity == purchase_requests[request_id].quantity
+        }
+        damaged_lines = [request_id for request_id in request_ids if evaluations[request_id][1] > 0]
+        damaged_items = []
+        if damaged_lines:
+            damaged_items = db.session.execute(
+                insert(DamagedItem).returning(
+                    DamagedItem.damaged_item_id,
+                    DamagedItem.evaluation_id,
+                    DamagedItem.quantity,
+                    DamagedItem.return_status,
+                    sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        'evaluation_id': evaluation_ids[request_id],
+                        'product_id': purchase_requests[request_id].product_id,
+                        'quantity': evaluations[request_id][1],
+                        'return_status': ReturnStatusEnum.rejected if request_id in rejected else ReturnStatusEnum.pending
+                    }
+                    for request_id in damaged_lines
+                ]
+            ).all()
+
+        statuses = {
+            PurchaseRequestStatusEnum.approved: [request_id for request_id in request_ids if request_id not in rejected],
+            PurchaseRequestStatusEnum.rejected: list(rejected)
+        }
+        for status, status_request_ids in statuses.items():
+            if status_request_ids:
+                db.session.execute(
+                    update(PurchaseRequest)
+                    .where(PurchaseRequest.request_id.in_(status_request_ids))
+                    .values(status=status),
+                    execution_options={'synchronize_session': False}
+                )
+
+        # The bulk UPDATE bypasses the ORM listeners, so count the approvals here
+        approval_deltas = {}
+        for request_id in statuses[PurchaseRequestStatusEnum.approved]:
+            purchase_request = purchase_requests[request_id]
+            key = approval_key(purchase_request.product_id, purchase_request.request_date)
+            approval_deltas[key] = approval_deltas.get(key, 0) + 1
+        apply_approval_deltas(db.session.connection(), approval_deltas)
+
+        # Receive the undamaged stock, totalled per product
+        received_quantities = {}
+        received_amounts = {}
+        movements = []
+        for request_id in request_ids:
+            undamaged_quantity = evaluations[request_id][0]
+            if undamaged_quantity == 0:
+                continue
+            purchase_request = purchase_requests[request_id]
+            product_id = purchase_request.product_id
+            receipt_amount = record_receipt(product_id, undamaged_quantity, purchase_request.unit_price)
+            received_quantities[product_id] = received_quantities.get(product_id, 0) + undamaged_quantity
+            received_amounts[product_id] = received_amounts.get(product_id, 0) + receipt_amount
+            movements.append({
+                'product_id': product_id,
+                'movement_type': MovementType.receipt,
+                'quantity_change': undamaged_quantity,
+                'amount_change': receipt_amount,
+                'reference_id': evaluation_ids[request_id]
+            })
+
+        changed = {}
+        if received_quantities:
+            # One grouped UPDATE for products already in stock, one insert for the rest
+            changed = {
+                product_id: (quantity, reorder_threshold)
+                for product_id, quantity, reorder_threshold in db.session.execute(
+                    update(Inventory)
+                    .where(Inventory.product_id.in_(list(received_quantities)))
+                    .values(
+                        quantity=Inventory.quantity + case(received_quantities, value=Inventory.product_id),
+                        running_amount=Inventory.running_amount + case(received_amounts, value=Inventory.product_id),
+                        updated_at=datetime.now(MANILA_TZ)
+                    )
+                    .returning(Inventory.product_id, Inventory.quantity, Inventory.reorder_threshold),
+                    execution_options={'synchronize_session': False}
+                )
+            }
+
+            new_products = [product_id for product_id in received_quantities if product_id not in changed]
+            if new_products:
+                changed.update(
+                    (product_id, (quantity, reorder_threshold))
+                    for product_id, quantity, reorder_threshold in db.session.execute(
+                        insert(Inventory).returning(Inventory.product_id, Inventory.quantity, Inventory.reorder_threshold),
+                        [
+                            {
+                                'product_id': product_id,
+                                'quantity': received_quantities[product_id],
+                                'running_amount': received_amounts[product_id]
+                            }
+                            for product_id in new_products
+                        ]
+                    )
+                )
+
+            record_movements(movements)
+
+        db.session.commit()
+        invalidate_supplier_scorecards(*{purchase_request.supplier_id for purchase_request in locked_requests})
+        report_cache.clear()
+
+        damaged_by_evaluation = {}
+        for damaged_item_id, evaluation_id, quantity, return_status in damaged_items:
+            damaged_by_evaluation[evaluation_id] = [{
+                'damaged_item_id': damaged_item_id,
+                'quantity': quantity,
+                'return_status': return_status.value
+            }]
+
+        response_data = [
+            {
+                'request_id': request_id,
+                'evaluation_id': evaluation_ids[request_id],
+                'damaged_items': damaged_by_evaluation.get(evaluation_ids[request_id], []),
+                'purchase_request_status': 'rejected' if request_id in rejected else 'approved'
+            }
+            for request_id in request_ids
+        ]
+
+        return make_response(jsonify({'message': 'Purchase requests evaluated successfully', 'data': response_data}), 201)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
 
 # Service function to get all evaluations
 def get_evaluations():
@@ -113,3 +360,30 @@ def get_evaluations():
     evaluations_list = [evaluation.to_dict() for evaluation in evaluations]
 
     return make_response(jsonify(evaluations_list), 200)
+
+# Service function to stream every evaluation as CSV or NDJSON
+def export_evaluations(args):
+    try:
+        statement = select(
+            Evaluation.evaluation_id,
+            Evaluation.request_id,
+            Evaluation.undamaged_quantity,
+            Evaluation.damaged_quantity,
+            Evaluation.evaluation_date,
+            Product.name.label('product_name'),
+            Product.brand,
+            Product.model,
+            PurchaseRequest.quantity,
+            Supplier.supplier_name,
+            PurchaseRequest.total_amount,
+            PurchaseRequest.status,
+            PurchaseRequest.request_date
+        ).join(PurchaseRequest, Evaluation.request_id == PurchaseRequest.request_id)\
+            .join(Product, PurchaseRequest.product_id == Product.product_id)\
+            .join(Supplier, PurchaseRequest.supplier_id == Supplier.supplier_id)\
+            .order_by(Evaluation.evaluation_id)
+
+        return stream_export(statement, 'evaluations', args.get('format', 'csv'))
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
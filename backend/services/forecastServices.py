@@ -0,0 +1,198 @@
+from flask import jsonify, make_response
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from models.demandforecast import DemandForecast, ForecastGranularity
+from models.departmentrequest import DepartmentRequest
+from app import db
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import joinedload
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.dates import manila_today
+
+# Days of request history each fit reads
+HISTORY_DAYS = 182
+SMOOTHING_ALPHA = 0.3
+MOVING_AVERAGE_PERIODS = {
+    ForecastGranularity.daily: 7,
+    ForecastGranularity.weekly: 4
+}
+MAX_HORIZON = 52
+# Products fitted per round trip, to bound the rows held in memory
+REFRESH_BATCH_SIZE = 1000
+
+def _period_start(day, granularity):
+    if granularity == ForecastGranularity.weekly:
+        return day - timedelta(days=day.weekday())
+    return day
+
+def _period_length(granularity):
+    return timedelta(days=7 if granularity == ForecastGranularity.weekly else 1)
+
+# Products with requests newer than their stored forecast, or every product with requests when full
+def _stale_products(full):
+    latest = select(
+        DepartmentRequest.product_id,
+        func.max(DepartmentRequest.department_request_id).label('last_request_id')
+    ).group_by(DepartmentRequest.product_id).subquery()
+
+    query = db.session.query(latest.c.product_id, latest.c.last_request_id)
+    if not full:
+        query = query.outerjoin(
+            DemandForecast,
+            (DemandForecast.product_id == latest.c.product_id) &
+            (DemandForecast.granularity == ForecastGranularity.daily)
+        ).filter(latest.c.last_request_id > func.coalesce(DemandForecast.last_request_id, 0))
+
+    return dict(query.order_by(latest.c.product_id).all())
+
+# Daily demand per product over the history window, one grouped query per batch
+def _daily_series(product_ids, since):
+    day = func.date(DepartmentRequest.request_date)
+    rows = db.session.query(
+        DepartmentRequest.product_id,
+        day.label('day'),
+        func.sum(DepartmentRequest.quantity)
+    ).filter(DepartmentRequest.product_id.in_(product_ids), DepartmentRequest.request_date >= since)\
+        .group_by(DepartmentRequest.product_id, day)\
+        .all()
+
+    series = {}
+    for product_id, request_day, quantity in rows:
+        # SQLite returns date() as text
+        if isinstance(request_day, str):
+            request_day = date.fromisoformat(request_day)
+        series.setdefault(product_id, {})[request_day] = int(quantity)
+    return series
+
+# Fit one series: zero-filled buckets from its first demand up to the last completed period.
+# The period containing today is still filling up, so fitting it would drag every forecast
+# down; the projection starts at that period instead.
+def _fit(daily, granularity, today):
+    buckets = {}
+    for request_day, quantity in daily.items():
+        period = _period_start(request_day, granularity)
+        buckets[period] = buckets.get(period, 0) + quantity
+
+    step = _period_length(granularity)
+    last_period = _period_start(today, granularity) - step
+    period = min(min(buckets), last_period)
+    values = []
+    while period <= last_period:
+        values.append(buckets.get(period, 0))
+        period += step
+
+    level = values[0]
+    for value in values[1:]:
+        level = SMOOTHING_ALPHA * value + (1 - SMOOTHING_ALPHA) * level
+
+    window = values[-MOVING_AVERAGE_PERIODS[granularity]:]
+    return {
+        'periods_observed': len(values),
+        'last_period': last_period,
+        'last_period_quantity': values[-1],
+        'moving_average': Decimal(sum(window) / len(window)).quantize(Decimal('0.0001')),
+        'smoothed': Decimal(level).quantize(Decimal('0.0001'))
+    }
+
+# Refit the forecasts of products with new department requests (all products when full)
+def refresh_forecasts(full=False):
+    stale = _stale_products(full)
+    today = manila_today()
+    since = datetime.combine(today - timedelta(days=HISTORY_DAYS), datetime.min.time())
+
+    product_ids = list(stale)
+    for start in range(0, len(product_ids), REFRESH_BATCH_SIZE):
+        batch = product_ids[start:start + REFRESH_BATCH_SIZE]
+        series = _daily_series(batch, since)
+
+        rows = []
+        for product_id in batch:
+            # A product whose requests all predate the window forecasts no demand
+            daily = series.get(product_id) or {today: 0}
+            for granularity in ForecastGranularity:
+                rows.append({
+                    'product_id': product_id,
+                    'granularity': granularity,
+                    'last_request_id': stale[product_id],
+                    **_fit(daily, granularity, today)
+                })
+
+        db.session.execute(delete(DemandForecast).where(DemandForecast.product_id.in_(batch)))
+        db.session.execute(insert(DemandForecast), rows)
+        db.session.commit()
+
+    return {'series_refreshed': len(product_ids)}
+
+def _parse_granularity(args):
+    granularity = args.get('granularity', ForecastGranularity.weekly.value)
+    if granularity not in [item.value for item in ForecastGranularity]:
+        raise ValueError('granularity must be daily or weekly')
+    return ForecastGranularity(granularity)
+
+# Service function to refit stale forecasts on demand
+def run_forecast_refresh(data):
+    try:
+        result = refresh_forecasts(full=bool((data or {}).get('full', False)))
+        return make_response(jsonify({'message': 'Demand forecasts refreshed successfully', 'data': result}), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to list stored forecasts, keyset-paginated on product_id
+def get_forecasts(args):
+    try:
+        granularity = _parse_granularity(args)
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        query = DemandForecast.query.options(joinedload(DemandForecast.product))\
+            .filter(DemandForecast.granularity == granularity)
+        if cursor is not None:
+            query = query.filter(DemandForecast.product_id > cursor)
+
+        forecasts = query.order_by(DemandForecast.product_id).limit(limit + 1).all()
+        has_more = len(forecasts) > limit
+        forecasts = forecasts[:limit]
+
+        return make_response(jsonify({
+            'forecasts': [forecast.to_dict() for forecast in forecasts],
+            'next_cursor': encode_cursor(forecasts[-1].product_id) if has_more else None
+        }), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+# Service function to get a product's forecast projected over the next horizon periods
+def get_product_forecast(product_id, args):
+    try:
+        granularity = _parse_granularity(args)
+        horizon = args.get('horizon', 4)
+        try:
+            horizon = int(horizon)
+        except (TypeError, ValueError):
+            raise ValueError('horizon must be a valid integer')
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f'horizon must be between 1 and {MAX_HORIZON}')
+
+        forecast = DemandForecast.query.filter_by(product_id=product_id, granularity=granularity).first()
+        if not forecast:
+            return make_response(jsonify({'error': 'No forecast found for this product'}), 404)
+
+        # Moving average and simple exponential smoothing both project a flat level
+        step = _period_length(granularity)
+        periods = [
+            {
+                'period': (forecast.last_period + step * offset).isoformat(),
+                'moving_average': str(forecast.moving_average),
+                'exponential_smoothing': str(forecast.smoothed)
+            }
+            for offset in range(1, horizon + 1)
+        ]
+
+        return make_response(jsonify({**forecast.to_dict(), 'horizon': horizon, 'periods': periods}), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
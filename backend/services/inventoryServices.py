@@ -1,56 +1,188 @@
 from flask import jsonify, make_response
 from models.inventory import Inventory
+from models.products import Product, ProductType
 from app import db
+from datetime import datetime
+import pytz
+from sqlalchemy import func, case, or_, update, select
+from sqlalchemy.orm import contains_eager
+from utils.pagination import parse_limit, parse_int_arg, encode_cursor, decode_cursor
+from utils.export import stream_export
+from utils.cache import report_cache
 
-# Service function to get all inventory
-def get_inventory():
-    # Add ordering to ensure the inventory is fetched in the correct order
-    inventory_items = Inventory.query.order_by(Inventory.inventory_id).all()
-    
-    inventory_list = []
-    total_quantity = 0  # Initialize total quantity
-
-    for inventory in inventory_items:
-        product = inventory.product
-        
-        # Get the inventory details and add product details
-        inventory_dict = inventory.to_dict()
-
-        # Include all relevant product details
-        inventory_dict['product_name'] = product.name if product else "Unknown"
-        inventory_dict['product_model'] = product.model if product else "Unknown"
-        inventory_dict['product_brand'] = product.brand if product else "Unknown"
-        inventory_dict['product_category'] = product.category if product else "Unknown"
-        inventory_dict['product_type'] = product.product_type.name if product and product.product_type else None
-
-        # Add the inventory's quantity to the total
-        total_quantity += inventory.quantity
-
-        inventory_list.append(inventory_dict)
-
-    # Include total quantity in the response
-    response_data = {
-        "total_quantity": total_quantity,
-        "inventory": inventory_list
-    }
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+# Apply the optional inventory filters from the query string
+def _filter_inventory(query, args):
+    category = args.get('category')
+    if category:
+        query = query.filter(Product.category == category)
+
+    product_type = args.get('product_type')
+    if product_type:
+        if product_type not in [item.value for item in ProductType]:
+            raise ValueError('Invalid product type')
+        query = query.filter(Product.product_type == ProductType(product_type))
+
+    brand = args.get('brand')
+    if brand:
+        query = query.filter(Product.brand == brand)
+
+    min_quantity = parse_int_arg(args, 'min_quantity')
+    if min_quantity is not None:
+        query = query.filter(Inventory.quantity >= min_quantity)
+
+    max_quantity = parse_int_arg(args, 'max_quantity')
+    if max_quantity is not None:
+        query = query.filter(Inventory.quantity <= max_quantity)
+
+    return query
+
+# Service function to get one page of inventory, keyset-paginated on inventory_id
+def get_inventory(args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        base_query = _filter_inventory(Inventory.query.join(Inventory.product), args)
+
+        page_query = base_query.options(contains_eager(Inventory.product))
+        if cursor is not None:
+            page_query = page_query.filter(Inventory.inventory_id > cursor)
+
+        # Fetch one extra row to know whether another page exists
+        inventory_items = page_query.order_by(Inventory.inventory_id).limit(limit + 1).all()
+        has_more = len(inventory_items) > limit
+        inventory_items = inventory_items[:limit]
+
+        # Total quantity across every matching row, computed by the database
+        total_quantity = base_query.with_entities(func.coalesce(func.sum(Inventory.quantity), 0)).scalar()
+
+        response_data = {
+            "total_quantity": int(total_quantity),
+            "inventory": [inventory.to_dict() for inventory in inventory_items],
+            "next_cursor": encode_cursor(inventory_items[-1].inventory_id) if has_more else None
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+# Service function to stream the whole inventory as CSV or NDJSON
+def export_inventory(args):
+    try:
+        statement = _filter_inventory(select(
+            Inventory.inventory_id,
+            Inventory.product_id,
+            Product.name.label('product_name'),
+            Product.model.label('product_model'),
+            Product.brand.label('product_brand'),
+            Product.category.label('product_category'),
+            Product.product_type,
+            Inventory.quantity,
+            Inventory.running_amount,
+            Inventory.reorder_threshold,
+            Inventory.created_at,
+            Inventory.updated_at
+        ).join(Product, Inventory.product_id == Product.product_id), args).order_by(Inventory.inventory_id)
 
-    return make_response(jsonify(response_data), 200)
+        return stream_export(statement, 'inventory', args.get('format', 'csv'))
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+def _stock_status(quantity, reorder_threshold):
+    if quantity <= 0:
+        return "Out of Stock"
+    if quantity < reorder_threshold:
+        return "Low Stock"
+    return "In Stock"
+
+def _notification(inventory):
+    return {
+        "product_id": inventory.product_id,
+        "product_name": inventory.product.name if inventory.product else "Unknown",
+        "quantity": inventory.quantity,
+        "reorder_threshold": inventory.reorder_threshold,
+        "status": _stock_status(inventory.quantity, inventory.reorder_threshold)
+    }
 
 # Service function to get notifications for low stock items
 def get_notifications():
-    inventory_items = Inventory.query.all()
-    low_stock_items = []
-
-    for inventory in inventory_items:
-        product = inventory.product
-        product_name = product.name if product else "Unknown"
-        
-        # Check for low stock or out-of-stock items
-        if inventory.quantity == 0 or inventory.quantity < 20:
-            low_stock_items.append({
-                "product_name": product_name,
-                "quantity": inventory.quantity,
-                "status": "Out of Stock" if inventory.quantity == 0 else "Low Stock"
-            })
-
-    return low_stock_items
\ No newline at end of file
+    # Same rule as _stock_status: below the threshold, or out of stock even when the threshold
+    # is 0. The gap <= 0 range matches the inventory_reorder_gap_idx expression, so only rows
+    # at or below their threshold are read.
+    gap = Inventory.quantity - Inventory.reorder_threshold
+    inventory_items = Inventory.query.join(Inventory.product)\
+        .options(contains_eager(Inventory.product))\
+        .filter(gap <= 0, or_(gap < 0, Inventory.quantity <= 0))\
+        .order_by(Inventory.quantity.asc())\
+        .all()
+
+    return [_notification(inventory) for inventory in inventory_items]
+
+# Service function to set the reorder threshold of a product
+def update_reorder_threshold(product_id, data):
+    try:
+        reorder_threshold = data.get('reorder_threshold')
+        try:
+            reorder_threshold = int(reorder_threshold)
+        except (TypeError, ValueError):
+            return make_response(jsonify({'error': 'Reorder threshold must be a valid integer'}), 400)
+
+        if reorder_threshold < 0:
+            return make_response(jsonify({'error': 'Reorder threshold cannot be negative'}), 400)
+
+        inventory = Inventory.query.filter_by(product_id=product_id).first()
+        if not inventory:
+            return make_response(jsonify({'error': f'No inventory record found for product_id {product_id}'}), 404)
+
+        inventory.reorder_threshold = reorder_threshold
+        db.session.commit()
+        report_cache.clear()
+
+        return make_response(jsonify({'message': 'Reorder threshold updated successfully', 'inventory': inventory.to_dict()}), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Atomically take stock for every product in quantities ({product_id: quantity}).
+# A single conditional UPDATE decrements only the rows that still hold enough stock,
+# so concurrent requests can never oversell and no prior read or row lock is needed.
+# Returns (reserved, failures): reserved maps product_id to (new quantity, reorder threshold),
+# failures maps product_id to 'not_found' or 'insufficient'. Callers roll back when failures
+# is not empty and commit the reservation together with their own rows otherwise.
+def reserve_stock(quantities):
+    # The result is keyed by the integer product_id the UPDATE returns, so "5" would never match
+    if not all(isinstance(product_id, int) and not isinstance(product_id, bool) for product_id in quantities):
+        raise ValueError('Product IDs must be integers')
+
+    requested = case(quantities, value=Inventory.product_id)
+
+    result = db.session.execute(
+        update(Inventory)
+        .where(Inventory.product_id.in_(list(quantities)), Inventory.quantity >= requested)
+        .values(quantity=Inventory.quantity - requested, updated_at=datetime.now(MANILA_TZ))
+        .returning(Inventory.product_id, Inventory.quantity, Inventory.reorder_threshold),
+        execution_options={'synchronize_session': False}
+    )
+    reserved = {product_id: (quantity, reorder_threshold) for product_id, quantity, reorder_threshold in result}
+
+    failures = {}
+    missing = [product_id for product_id in quantities if product_id not in reserved]
+    if missing:
+        # Only the failure path reads inventory, to tell missing rows from short stock
+        existing = {
+            product_id for (product_id,) in
+            db.session.query(Inventory.product_id).filter(Inventory.product_id.in_(missing))
+        }
+        failures = {
+            product_id: 'insufficient' if product_id in existing else 'not_found'
+            for product_id in missing
+        }
+
+    return reserved, failures
@@ -0,0 +1,234 @@
+from flask import jsonify, make_response
+from models.inventory import Inventory
+from models.inventorymovement import InventoryMovement, MovementType
+from models.inventorysnapshot import InventorySnapshot
+from app import db
+from sqlalchemy import func, insert, select, text
+from models.products import Product
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.dates import parse_datetime_arg
+
+# Add a movement to the current session; the caller commits it with the stock change
+def record_movement(product_id, movement_type, quantity_change, amount_change=0, reference_id=None):
+    movement = InventoryMovement(
+        product_id=product_id,
+        movement_type=movement_type,
+        quantity_change=quantity_change,
+        amount_change=amount_change,
+        reference_id=reference_id
+    )
+    db.session.add(movement)
+    return movement
+
+# Bulk variant of record_movement: one multi-row insert for a whole batch
+def record_movements(movements):
+    if movements:
+        db.session.execute(insert(InventoryMovement), movements)
+
+# Record opening balances for stock that predates the ledger, once per product
+def _record_opening_balances():
+    has_snapshot = select(InventorySnapshot.snapshot_id)\
+        .where(InventorySnapshot.product_id == Inventory.product_id)\
+        .exists()
+
+    ledger = db.session.query(
+        InventoryMovement.product_id,
+        func.sum(InventoryMovement.quantity_change).label('quantity'),
+        func.sum(InventoryMovement.amount_change).label('amount')
+    ).group_by(InventoryMovement.product_id).subquery()
+
+    # Whatever the ledger does not explain about an unsnapshotted product is its opening balance
+    opening_rows = db.session.query(
+        Inventory.product_id,
+        (Inventory.quantity - func.coalesce(ledger.c.quantity, 0)).label('quantity'),
+        (Inventory.running_amount - func.coalesce(ledger.c.amount, 0)).label('amount'),
+        Inventory.created_at
+    ).outerjoin(ledger, ledger.c.product_id == Inventory.product_id)\
+        .filter(~has_snapshot)\
+        .all()
+
+    opening_movements = [
+        {
+            'product_id': row.product_id,
+            'movement_type': MovementType.adjustment,
+            'quantity_change': row.quantity,
+            'amount_change': row.amount,
+            'created_at': row.created_at
+        }
+        for row in opening_rows if row.quantity or row.amount
+    ]
+
+    if opening_movements:
+        db.session.execute(insert(InventoryMovement), opening_movements)
+
+    return len(opening_movements)
+
+# Wait for in-flight movement writers to commit and hold off new ones until this transaction
+# ends. Ids are assigned at insert but become visible at commit, so without this a lower id can
+# commit after a snapshot already folded a higher one and be skipped by every later run.
+def _lock_movements():
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text('LOCK TABLE inventory_movements IN SHARE ROW EXCLUSIVE MODE'))
+
+# Fold every movement recorded since each product's latest snapshot into a new snapshot
+def take_snapshots():
+    _lock_movements()
+    opening_balances = _record_opening_balances()
+
+    # Every movement up to this id has committed while the lock is held
+    watermark = db.session.query(func.max(InventoryMovement.movement_id)).scalar()
+    if watermark is None:
+        db.session.commit()
+        return {'opening_balances': opening_balances, 'snapshots_created': 0}
+
+    latest_snapshot = db.session.query(
+        InventorySnapshot.product_id,
+        func.max(InventorySnapshot.snapshot_id).label('snapshot_id')
+    ).group_by(InventorySnapshot.product_id).subquery()
+
+    previous = db.aliased(InventorySnapshot)
+
+    # Driven from products so each tail is a (product_id, movement_id) range on the index,
+    # bounded below by that product's last snapshot and above by the watermark
+    tails = db.session.query(
+        Product.product_id,
+        func.sum(InventoryMovement.quantity_change).label('quantity_change'),
+        func.sum(InventoryMovement.amount_change).label('amount_change'),
+        func.max(InventoryMovement.movement_id).label('last_movement_id'),
+        func.max(InventoryMovement.created_at).label('snapshot_date'),
+        func.max(previous.quantity).label('previous_quantity'),
+        func.max(previous.running_amount).label('previous_amount')
+    ).outerjoin(latest_snapshot, latest_snapshot.c.product_id == Product.product_id)\
+        .outerjoin(previous, previous.snapshot_id == latest_snapshot.c.snapshot_id)\
+        .join(InventoryMovement, db.and_(
+            InventoryMovement.product_id == Product.product_id,
+            InventoryMovement.movement_id > func.coalesce(previous.last_movement_id, 0),
+            InventoryMovement.movement_id <= watermark
+        ))\
+        .group_by(Product.product_id)\
+        .all()
+
+    snapshots = [
+        {
+            'product_id': tail.product_id,
+            'quantity': (tail.previous_quantity or 0) + tail.quantity_change,
+            'running_amount': (tail.previous_amount or 0) + tail.amount_change,
+            'last_movement_id': tail.last_movement_id,
+            'snapshot_date': tail.snapshot_date
+        }
+        for tail in tails
+    ]
+
+    if snapshots:
+        db.session.execute(insert(InventorySnapshot), snapshots)
+    db.session.commit()
+
+    return {'opening_balances': opening_balances, 'snapshots_created': len(snapshots)}
+
+# Service function to run the periodic snapshot job on demand
+def create_snapshots():
+    try:
+        result = take_snapshots()
+        return make_response(jsonify({'message': 'Inventory snapshots created successfully', 'data': result}), 201)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to get the stock of a product as of a point in time
+def get_stock_at(product_id, args):
+    try:
+        as_of = parse_datetime_arg(args.get('as_of'), 'as_of')
+        if as_of is None:
+            return make_response(jsonify({'error': 'as_of is required'}), 400)
+
+        # Latest snapshot at or before as_of, then only the movements recorded after it
+        snapshot = InventorySnapshot.query\
+            .filter(InventorySnapshot.product_id == product_id, InventorySnapshot.snapshot_date <= as_of)\
+            .order_by(InventorySnapshot.snapshot_date.desc(), InventorySnapshot.snapshot_id.desc())\
+            .first()
+
+        if snapshot is None:
+            # No snapshot yet (opening balances are only seeded by take_snapshots), so walk
+            # back from the live stock by undoing every movement recorded after as_of
+            quantity, running_amount = db.session.query(
+                func.coalesce(func.sum(Inventory.quantity), 0),
+                func.coalesce(func.sum(Inventory.running_amount), 0)
+            ).filter(Inventory.product_id == product_id).one()
+
+            quantity_change, amount_change, movements_applied = db.session.query(
+                func.coalesce(func.sum(InventoryMovement.quantity_change), 0),
+                func.coalesce(func.sum(InventoryMovement.amount_change), 0),
+                func.count(InventoryMovement.movement_id)
+            ).filter(
+                InventoryMovement.product_id == product_id,
+                InventoryMovement.created_at > as_of
+            ).one()
+
+            response_data = {
+                'product_id': product_id,
+                'as_of': as_of.isoformat(),
+                'quantity': quantity - quantity_change,
+                'running_amount': str(running_amount - amount_change),
+                'snapshot_id': None,
+                'movements_applied': movements_applied
+            }
+            return make_response(jsonify(response_data), 200)
+
+        quantity_change, amount_change, movements_applied = db.session.query(
+            func.coalesce(func.sum(InventoryMovement.quantity_change), 0),
+            func.coalesce(func.sum(InventoryMovement.amount_change), 0),
+            func.count(InventoryMovement.movement_id)
+        ).filter(
+            InventoryMovement.product_id == product_id,
+            InventoryMovement.movement_id > snapshot.last_movement_id,
+            InventoryMovement.created_at <= as_of
+        ).one()
+
+        response_data = {
+            'product_id': product_id,
+            'as_of': as_of.isoformat(),
+            'quantity': snapshot.quantity + quantity_change,
+            'running_amount': str(snapshot.running_amount + amount_change),
+            'snapshot_id': snapshot.snapshot_id,
+            'movements_applied': movements_applied
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+# Service function to get the movement history of a product, keyset-paginated on movement_id
+def get_movement_history(product_id, args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        start_date = parse_datetime_arg(args.get('start_date'), 'start_date')
+        end_date = parse_datetime_arg(args.get('end_date'), 'end_date')
+
+        query = InventoryMovement.query.filter(InventoryMovement.product_id == product_id)
+        if start_date:
+            query = query.filter(InventoryMovement.created_at >= start_date)
+        if end_date:
+            query = query.filter(InventoryMovement.created_at <= end_date)
+        if cursor is not None:
+            query = query.filter(InventoryMovement.movement_id > cursor)
+
+        movements = query.order_by(InventoryMovement.movement_id).limit(limit + 1).all()
+        has_more = len(movements) > limit
+        movements = movements[:limit]
+
+        response_data = {
+            'product_id': product_id,
+            'movements': [movement.to_dict() for movement in movements],
+            'next_cursor': encode_cursor(movements[-1].movement_id) if has_more else None
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
@@ -2,11 +2,22 @@ from flask import jsonify, make_response
 from models.maintenance import Maintenance, MaintenanceStatus
 from models.products import Product
 from app import db
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select, tuple_, union_all
+from sqlalchemy.orm import joinedload
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.dates import parse_datetime_arg
+from utils.cache import report_cache
 import pytz
 
 MANILA_TZ = pytz.timezone("Asia/Manila")
 
+# A job without a completed date occupies this slot from its scheduled date
+JOB_SLOT = timedelta(hours=2)
+# Longest date range one calendar query may cover
+MAX_RANGE_DAYS = 366
+OPEN_STATUSES = (MaintenanceStatus.pending, MaintenanceStatus.in_progress)
+
 def create_maintenance(data):
     try:
         # Extract data from the input dictionary
@@ -33,6 +44,7 @@ def create_maintenance(data):
 
         db.session.add(maintenance)
         db.session.commit()
+        report_cache.clear()
 
         # Return the created maintenance as a dictionary (or JSON)
         return make_response(jsonify(maintenance.to_dict()), 201)
@@ -55,6 +67,7 @@ def take_action(maintenance_id):
 
         maintenance.status = MaintenanceStatus.in_progress
         db.session.commit()
+        report_cache.clear()
 
         return make_response(jsonify(maintenance.to_dict()), 200)
 
@@ -78,6 +91,7 @@ def take_action_completed(maintenance_id, data):
         maintenance.notes = data.get('notes')
 
         db.session.commit()
+        report_cache.clear()
 
         return make_response(jsonify(maintenance.to_dict()), 200)
 
@@ -102,6 +116,7 @@ def take_action_condemned(maintenance_id, data):
         maintenance.notes = data.get('notes', '')
 
         db.session.commit()
+        report_cache.clear()
 
         return make_response(jsonify(maintenance.to_dict()), 200)
 
@@ -130,3 +145,194 @@ def get_maintenance():
 
     except Exception as e:
         return make_response(jsonify({"error": "Internal Server Error", "message": str(e)}), 500)
+
+# Read the required start_date/end_date pair as Manila-aware datetimes, bounded to MAX_RANGE_DAYS
+def _parse_range(args):
+    start = parse_datetime_arg(args.get('start_date'), 'start_date')
+    end = parse_datetime_arg(args.get('end_date'), 'end_date')
+    if not start or not end:
+        raise ValueError('start_date and end_date are required')
+    if end <= start:
+        raise ValueError('end_date must be after start_date')
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f'The date range cannot exceed {MAX_RANGE_DAYS} days')
+    return MANILA_TZ.localize(start), MANILA_TZ.localize(end)
+
+# Ids and scheduled dates of the jobs whose interval overlaps [start, end): pending jobs
+# occupy their slot, in-progress jobs run until completed and finished jobs run until their
+# completed date. Each branch is a range on its own index, so history outside the range is
+# never read; an OR of the three lets the planner fall back to scanning scheduled_date.
+def _overlapping(start, end):
+    branches = (
+        (Maintenance.status == MaintenanceStatus.pending, Maintenance.scheduled_date > start - JOB_SLOT),
+        (Maintenance.status == MaintenanceStatus.in_progress,),
+        (Maintenance.completed_date >= start, Maintenance.status.notin_(OPEN_STATUSES))
+    )
+    return union_all(*[
+        select(Maintenance.maintenance_id, Maintenance.scheduled_date)
+        .where(Maintenance.scheduled_date < end, *conditions)
+        for conditions in branches
+    ]).subquery()
+
+def _week_start(column):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column, 'weekday 0', '-6 days')
+    return func.date(func.date_trunc('week', func.timezone(MANILA_TZ.zone, column)))
+
+# Service function to get the jobs overlapping a date range, keyset-paginated on scheduled_date
+def get_maintenance_schedule(args):
+    try:
+        start, end = _parse_range(args)
+        limit = parse_limit(args)
+
+        overlapping = _overlapping(start, end)
+        query = Maintenance.query.options(joinedload(Maintenance.product))\
+            .join(overlapping, overlapping.c.maintenance_id == Maintenance.maintenance_id)
+
+        engineer_name = args.get('engineer_name')
+        if engineer_name:
+            query = query.filter(Maintenance.engineer_name == engineer_name)
+
+        status = args.get('status')
+        if status:
+            if status not in [item.value for item in MaintenanceStatus]:
+                raise ValueError('Invalid status')
+            query = query.filter(Maintenance.status == MaintenanceStatus(status))
+
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None:
+            try:
+                after = tuple_(datetime.fromisoformat(cursor[0]), int(cursor[1]))
+            except (TypeError, ValueError, IndexError):
+                raise ValueError('Invalid cursor')
+            query = query.filter(tuple_(overlapping.c.scheduled_date, overlapping.c.maintenance_id) > after)
+
+        maintenances = query.order_by(overlapping.c.scheduled_date, overlapping.c.maintenance_id).limit(limit + 1).all()
+        has_more = len(maintenances) > limit
+        maintenances = maintenances[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = maintenances[-1]
+            next_cursor = encode_cursor([last.scheduled_date.isoformat(), last.maintenance_id])
+
+        response_data = {
+            "maintenances": [maintenance.to_dict() for maintenance in maintenances],
+            "next_cursor": next_cursor
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    except Exception as e:
+        return make_response(jsonify({"error": "Internal Server Error", "message": str(e)}), 500)
+
+# Service function to count each engineer's jobs per week (weeks start on Monday) by scheduled date
+def get_engineer_workload(args):
+    try:
+        start, end = _parse_range(args)
+        week = _week_start(Maintenance.scheduled_date)
+
+        query = db.session.query(
+            Maintenance.engineer_name,
+            week.label('week_start'),
+            func.count(Maintenance.maintenance_id).label('jobs'),
+            func.sum(case((Maintenance.status.in_(OPEN_STATUSES), 1), else_=0)).label('open_jobs'),
+            func.sum(case((Maintenance.status == MaintenanceStatus.completed, 1), else_=0)).label('completed_jobs'),
+            func.sum(case((Maintenance.status == MaintenanceStatus.condemned, 1), else_=0)).label('condemned_jobs')
+        ).filter(Maintenance.scheduled_date >= start, Maintenance.scheduled_date < end)
+
+        engineer_name = args.get('engineer_name')
+        if engineer_name:
+            query = query.filter(Maintenance.engineer_name == engineer_name)
+
+        rows = query.group_by(Maintenance.engineer_name, week)\
+            .order_by(Maintenance.engineer_name, week)\
+            .all()
+
+        engineers = {}
+        for row in rows:
+            # SQLite returns date() as text
+            week_start = row.week_start if isinstance(row.week_start, str) else row.week_start.isoformat()
+            engineers.setdefault(row.engineer_name, []).append({
+                "week_start": week_start,
+                "jobs": row.jobs,
+                "open_jobs": int(row.open_jobs),
+                "completed_jobs": int(row.completed_jobs),
+                "condemned_jobs": int(row.condemned_jobs)
+            })
+
+        response_data = {
+            "engineers": [
+                {"engineer_name": name, "weeks": weeks}
+                for name, weeks in engineers.items()
+            ]
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    except Exception as e:
+        return make_response(jsonify({"error": "Internal Server Error", "message": str(e)}), 500)
+
+# Service function to find open jobs booked for the same engineer in overlapping intervals.
+# Candidates come from _overlapping, so a job's interval is the same as in the calendar: a
+# pending job holds its slot and an in-progress job runs until it is completed. A sweep per
+# engineer then keeps the jobs still running at each start.
+def get_maintenance_conflicts(args):
+    try:
+        start, end = _parse_range(args)
+
+        overlapping = _overlapping(start, end)
+        query = db.session.query(
+            Maintenance.maintenance_id,
+            Maintenance.product_id,
+            Maintenance.engineer_name,
+            Maintenance.scheduled_date,
+            Maintenance.status
+        ).join(overlapping, overlapping.c.maintenance_id == Maintenance.maintenance_id)\
+            .filter(Maintenance.status.in_(OPEN_STATUSES))
+
+        engineer_name = args.get('engineer_name')
+        if engineer_name:
+            query = query.filter(Maintenance.engineer_name == engineer_name)
+
+        rows = query.order_by(Maintenance.engineer_name, Maintenance.scheduled_date, Maintenance.maintenance_id).all()
+
+        conflicts = []
+        running = []
+        current_engineer = None
+        for row in rows:
+            if row.engineer_name != current_engineer:
+                current_engineer = row.engineer_name
+                running = []
+            running = [
+                job for job in running
+                if job.status == MaintenanceStatus.in_progress or job.scheduled_date + JOB_SLOT > row.scheduled_date
+            ]
+            for job in running:
+                conflicts.append({
+                    "engineer_name": row.engineer_name,
+                    "maintenance_ids": [job.maintenance_id, row.maintenance_id],
+                    "product_ids": [job.product_id, row.product_id],
+                    "scheduled_dates": [job.scheduled_date.isoformat(), row.scheduled_date.isoformat()]
+                })
+            running.append(row)
+
+        response_data = {
+            "slot_hours": JOB_SLOT.total_seconds() / 3600,
+            "total_conflicts": len(conflicts),
+            "conflicts": conflicts
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+
+    except Exception as e:
+        return make_response(jsonify({"error": "Internal Server Error", "message": str(e)}), 500)
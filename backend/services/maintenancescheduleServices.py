@@ -0,0 +1,350 @@
+from flask import jsonify, make_response
+import calendar
+from datetime import datetime, timedelta
+from models.maintenance import Maintenance, MaintenanceStatus
+from models.maintenanceschedule import MaintenanceSchedule, RecurrenceType
+from models.products import Product, ProductType
+from app import db
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from utils.pagination import parse_limit, parse_int_arg, encode_cursor, decode_cursor
+from utils.dates import parse_datetime_arg, to_manila_naive
+from utils.cache import report_cache
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+DEFAULT_HORIZON_DAYS = 365
+MAX_HORIZON_DAYS = 730
+MAX_INTERVAL_DAYS = 3650
+# Schedules expanded per round trip, to bound the job rows held in memory
+GENERATE_BATCH_SIZE = 1000
+
+def _add_months(year, month, count):
+    month += count
+    return year + (month - 1) // 12, (month - 1) % 12 + 1
+
+# Occurrences of a schedule from since (inclusive) up to until (inclusive). All times are naive
+# Manila times. Both rules are anchored on start, so a rerun always lands on the same occurrences.
+def _occurrences(schedule, start, end, since, until):
+    if end and end < until:
+        until = end
+    since = max(since, start)
+
+    if schedule.recurrence_type == RecurrenceType.interval:
+        step = timedelta(days=schedule.interval_days)
+        occurrence = start - step * ((start - since) // step)
+        while occurrence <= until:
+            yield occurrence
+            occurrence += step
+        return
+
+    # Monthly on day_of_month, falling back to the last day of shorter months
+    year, month = since.year, since.month
+    while True:
+        day = min(schedule.day_of_month, calendar.monthrange(year, month)[1])
+        occurrence = start.replace(year=year, month=month, day=day)
+        if occurrence > until:
+            return
+        if occurrence >= since:
+            yield occurrence
+        year, month = _add_months(year, month, 1)
+
+# Insert generated jobs, skipping occurrences that already have one. Returns the number inserted.
+def _insert_missing_jobs(rows):
+    if not rows:
+        return 0
+
+    table = Maintenance.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        statement = (postgresql if dialect == 'postgresql' else sqlite).insert(table)
+        statement = statement.on_conflict_do_nothing(index_elements=[table.c.schedule_id, table.c.scheduled_date])
+        return len(db.session.execute(statement.returning(table.c.maintenance_id), rows).all())
+
+    existing = set(db.session.execute(
+        select(table.c.schedule_id, table.c.scheduled_date).where(
+            table.c.schedule_id.in_({row['schedule_id'] for row in rows}),
+            table.c.scheduled_date >= min(row['scheduled_date'] for row in rows)
+        )
+    ).all())
+    existing = {(schedule_id, to_manila_naive(scheduled_date)) for schedule_id, scheduled_date in existing}
+    rows = [row for row in rows if (row['schedule_id'], to_manila_naive(row['scheduled_date'])) not in existing]
+    if rows:
+        db.session.execute(insert(table), rows)
+    return len(rows)
+
+# Expand every active asset schedule up to horizon_days ahead and insert the pending jobs not
+# created yet. Occurrences already generated are never revisited, so a job deleted by hand
+# stays deleted, unless a pause withdrew it first; condemned assets are skipped.
+def generate_preventive_maintenance(horizon_days=DEFAULT_HORIZON_DAYS):
+    generated_at = datetime.now(MANILA_TZ)
+    now = generated_at.replace(tzinfo=None)
+    until = now + timedelta(days=horizon_days)
+    # Manila keeps one UTC offset all year, so one resolved tzinfo serves every occurrence
+    # and saves a localize() call per generated job
+    manila = generated_at.tzinfo
+
+    condemned = select(Maintenance.maintenance_id).where(
+        Maintenance.product_id == MaintenanceSchedule.product_id,
+        Maintenance.status == MaintenanceStatus.condemned
+    ).exists()
+
+    query = db.session.query(
+        MaintenanceSchedule.schedule_id,
+        MaintenanceSchedule.product_id,
+        MaintenanceSchedule.engineer_name,
+        MaintenanceSchedule.description,
+        MaintenanceSchedule.recurrence_type,
+        MaintenanceSchedule.interval_days,
+        MaintenanceSchedule.day_of_month,
+        MaintenanceSchedule.start_date,
+        MaintenanceSchedule.end_date,
+        MaintenanceSchedule.generated_through
+    ).join(Product, MaintenanceSchedule.product_id == Product.product_id)\
+        .filter(
+            MaintenanceSchedule.active.is_(True),
+            Product.product_type == ProductType.asset,
+            ~condemned,
+            or_(MaintenanceSchedule.end_date.is_(None), MaintenanceSchedule.end_date >= MANILA_TZ.localize(now)),
+            or_(MaintenanceSchedule.generated_through.is_(None), MaintenanceSchedule.generated_through < MANILA_TZ.localize(until))
+        )
+
+    schedules_processed = 0
+    jobs_created = 0
+    last_schedule_id = 0
+    while True:
+        batch = query.filter(MaintenanceSchedule.schedule_id > last_schedule_id)\
+            .order_by(MaintenanceSchedule.schedule_id)\
+            .limit(GENERATE_BATCH_SIZE)\
+            .all()
+        if not batch:
+            break
+        last_schedule_id = batch[-1].schedule_id
+
+        rows = []
+        for schedule in batch:
+            # Resume just after the last generated occurrence, never in the past
+            since = now
+            generated_through = to_manila_naive(schedule.generated_through)
+            if generated_through and generated_through >= now:
+                since = generated_through + timedelta(microseconds=1)
+
+            rows.extend(
+                {
+                    'product_id': schedule.product_id,
+                    'schedule_id': schedule.schedule_id,
+                    'engineer_name': schedule.engineer_name,
+                    'description': schedule.description,
+                    'scheduled_date': occurrence.replace(tzinfo=manila),
+                    'status': MaintenanceStatus.pending,
+                    'created_at': generated_at,
+                    'updated_at': generated_at
+                }
+                for occurrence in _occurrences(
+                    schedule, to_manila_naive(schedule.start_date), to_manila_naive(schedule.end_date), since, until
+                )
+            )
+
+        jobs_created += _insert_missing_jobs(rows)
+        db.session.execute(
+            update(MaintenanceSchedule)
+            .where(MaintenanceSchedule.schedule_id.in_([schedule.schedule_id for schedule in batch]))
+            .values(generated_through=MANILA_TZ.localize(until)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        schedules_processed += len(batch)
+
+    if jobs_created:
+        report_cache.clear()
+
+    return {
+        'horizon_days': horizon_days,
+        'generated_through': MANILA_TZ.localize(until).isoformat(),
+        'schedules_processed': schedules_processed,
+        'jobs_created': jobs_created
+    }
+
+def _parse_positive_int(data, name, maximum):
+    value = data.get(name)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f'{name} must be a valid integer')
+    if not 1 <= value <= maximum:
+        raise ValueError(f'{name} must be between 1 and {maximum}')
+    return value
+
+# Service function to run the preventive maintenance generator from the API
+def run_maintenance_generation(data):
+    try:
+        data = data or {}
+        horizon_days = DEFAULT_HORIZON_DAYS
+        if 'horizon_days' in data:
+            horizon_days = _parse_positive_int(data, 'horizon_days', MAX_HORIZON_DAYS)
+
+        result = generate_preventive_maintenance(horizon_days)
+        return make_response(jsonify({'message': 'Preventive maintenance generated successfully', 'data': result}), 201)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to create one recurrence rule for each of the given assets
+def create_maintenance_schedules(data):
+    try:
+        data = data or {}
+        product_ids = data.get('product_ids')
+        if product_ids is None and data.get('product_id') is not None:
+            product_ids = [data.get('product_id')]
+        if not product_ids or not isinstance(product_ids, list):
+            return make_response(jsonify({'error': 'product_id or a non-empty product_ids list is required'}), 400)
+        if not all(isinstance(product_id, int) and not isinstance(product_id, bool) for product_id in product_ids):
+            return make_response(jsonify({'error': 'product_ids must be integers'}), 400)
+        product_ids = list(dict.fromkeys(product_ids))
+
+        engineer_name = data.get('engineer_name')
+        if not engineer_name:
+            return make_response(jsonify({'error': 'Engineer Name is required'}), 400)
+
+        recurrence_type = data.get('recurrence_type')
+        if recurrence_type not in [item.value for item in RecurrenceType]:
+            return make_response(jsonify({'error': 'recurrence_type must be interval or monthly'}), 400)
+        recurrence_type = RecurrenceType(recurrence_type)
+
+        interval_days = None
+        day_of_month = None
+        if recurrence_type == RecurrenceType.interval:
+            interval_days = _parse_positive_int(data, 'interval_days', MAX_INTERVAL_DAYS)
+        else:
+            day_of_month = _parse_positive_int(data, 'day_of_month', 31)
+
+        start_date = parse_datetime_arg(data.get('start_date'), 'start_date')
+        if not start_date:
+            return make_response(jsonify({'error': 'start_date is required'}), 400)
+        end_date = parse_datetime_arg(data.get('end_date'), 'end_date')
+        if end_date and end_date <= start_date:
+            return make_response(jsonify({'error': 'end_date must be after start_date'}), 400)
+
+        product_types = dict(
+            db.session.query(Product.product_id, Product.product_type)
+            .filter(Product.product_id.in_(product_ids))
+        )
+        errors = []
+        for product_id in product_ids:
+            if product_id not in product_types:
+                errors.append({'product_id': product_id, 'error': 'Product not found'})
+            elif product_types[product_id] != ProductType.asset:
+                errors.append({'product_id': product_id, 'error': 'Preventive maintenance can only be scheduled for assets'})
+        if errors:
+            return make_response(jsonify({'error': 'Maintenance schedules could not be created', 'details': errors}), 400)
+
+        schedule_ids = db.session.execute(
+            insert(MaintenanceSchedule).returning(MaintenanceSchedule.schedule_id, sort_by_parameter_order=True),
+            [
+                {
+                    'product_id': product_id,
+                    'engineer_name': engineer_name,
+                    'description': data.get('description'),
+                    'recurrence_type': recurrence_type,
+                    'interval_days': interval_days,
+                    'day_of_month': day_of_month,
+                    'start_date': MANILA_TZ.localize(start_date),
+                    'end_date': MANILA_TZ.localize(end_date) if end_date else None
+                }
+                for product_id in product_ids
+            ]
+        ).scalars().all()
+        db.session.commit()
+
+        schedules = MaintenanceSchedule.query.options(joinedload(MaintenanceSchedule.product))\
+            .filter(MaintenanceSchedule.schedule_id.in_(schedule_ids))\
+            .order_by(MaintenanceSchedule.schedule_id)\
+            .all()
+
+        return make_response(jsonify({
+            'message': 'Maintenance schedules created successfully',
+            'schedules': [schedule.to_dict() for schedule in schedules]
+        }), 201)
+
+    except ValueError as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to list recurrence rules, keyset-paginated on schedule_id
+def get_maintenance_schedules(args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        query = MaintenanceSchedule.query.options(joinedload(MaintenanceSchedule.product))
+
+        product_id = parse_int_arg(args, 'product_id')
+        if product_id is not None:
+            query = query.filter(MaintenanceSchedule.product_id == product_id)
+
+        active = args.get('active')
+        if active is not None:
+            query = query.filter(MaintenanceSchedule.active.is_(active.lower() == 'true'))
+
+        if cursor is not None:
+            query = query.filter(MaintenanceSchedule.schedule_id > cursor)
+
+        schedules = query.order_by(MaintenanceSchedule.schedule_id).limit(limit + 1).all()
+        has_more = len(schedules) > limit
+        schedules = schedules[:limit]
+
+        return make_response(jsonify({
+            'schedules': [schedule.to_dict() for schedule in schedules],
+            'next_cursor': encode_cursor(schedules[-1].schedule_id) if has_more else None
+        }), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+# Service function to pause or resume a schedule. Pausing removes its upcoming pending jobs and
+# pulls generated_through back to the pause, since nothing after it is generated any more.
+# Resuming keeps that watermark, so the next generator run creates jobs from the resume onwards
+# and never revisits occurrences generated before the pause.
+def toggle_maintenance_schedule(schedule_id):
+    try:
+        schedule = MaintenanceSchedule.query.get(schedule_id)
+        if not schedule:
+            return make_response(jsonify({'error': 'Maintenance schedule not found'}), 404)
+
+        removed = 0
+        if schedule.active:
+            paused_at = datetime.now(MANILA_TZ)
+            removed = db.session.execute(
+                delete(Maintenance).where(and_(
+                    Maintenance.schedule_id == schedule_id,
+                    Maintenance.status == MaintenanceStatus.pending,
+                    Maintenance.scheduled_date >= paused_at
+                )),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            schedule.generated_through = paused_at
+        schedule.active = not schedule.active
+
+        db.session.commit()
+        if removed:
+            report_cache.clear()
+
+        return make_response(jsonify({
+            'message': 'Maintenance schedule status updated successfully',
+            'pending_jobs_removed': removed,
+            'schedule': schedule.to_dict()
+        }), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
@@ -1,9 +1,18 @@
 from flask import jsonify, make_response
-from models.products import Product, ProductType
+import csv
+import io
+import json
+import re
+from models.products import Product, ProductType, PRODUCT_SEARCH_EXPRESSION
 from models.supplier import Supplier
 from app import db
 from psycopg2.errors import NumericValueOutOfRange
+from sqlalchemy import insert, select, or_, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
+from utils.cache import reference_cache
+from utils.etag import collection_version
+from utils.pagination import parse_limit
 
 # Service function to create a new product
 def create_product(data):
@@ -42,6 +51,7 @@ def create_product(data):
         # Save the new product to the database
         db.session.add(new_product)
         db.session.commit()
+        reference_cache.invalidate('products')
 
         # Prepare the response to return
         product_response = {
@@ -115,6 +125,7 @@ def update_product(product_id, data):
 
         # Commit the changes to the database
         db.session.commit()
+        reference_cache.invalidate('products')
 
         # Prepare the updated product response
         product_response = {
@@ -148,6 +159,7 @@ def delete_product(product_id):
 
         db.session.delete(product)
         db.session.commit()
+        reference_cache.invalidate('products')
 
         return make_response(jsonify({'message': 'Product deleted successfully'}), 200)
 
@@ -167,17 +179,110 @@ def delete_product(product_id):
     
     # Service function to get all products
 def get_products():
-    # Query all products and order them by product_id in ascending order
-    products = Product.query.order_by(Product.product_id.asc()).all()
-    products_list = []
-
-    for product in products:
-        product_dict = product.to_dict()
-        products_list.append(product_dict)
+    # Serve the serialized list from the cache, querying and ordering by product_id on a miss.
+    # The entry is tied to the version the ETag is built from, so a worker never serves a
+    # body older than its tag; the version is read first, so a racing write only makes it newer.
+    products_list = reference_cache.get_or_load_versioned('products', collection_version(Product.updated_at), lambda: [
+        product.to_dict() for product in Product.query.order_by(Product.product_id.asc()).all()
+    ])
 
     return make_response(jsonify(products_list), 200)
 
 
+SEARCH_COLUMNS = 'p.product_id, p.name, p.category, p.product_type, p.brand, p.model'
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+# PostgreSQL: pg_trgm similarity for fuzzy matches, with name prefix matches ranked first
+def _search_products_postgresql(term, limit):
+    return db.session.execute(text(f"""
+        SELECT {SEARCH_COLUMNS},
+               lower(p.name) LIKE :prefix ESCAPE '\\' AS prefix_match,
+               similarity({PRODUCT_SEARCH_EXPRESSION}, :term) AS score
+        FROM products p
+        WHERE {PRODUCT_SEARCH_EXPRESSION} % :term
+           OR {PRODUCT_SEARCH_EXPRESSION} LIKE :contains ESCAPE '\\'
+           OR lower(p.name) LIKE :prefix ESCAPE '\\'
+        ORDER BY prefix_match DESC, score DESC, p.name
+        LIMIT :limit
+    """), {
+        'term': term,
+        'prefix': f'{_like_escape(term)}%',
+        'contains': f'%{_like_escape(term)}%',
+        'limit': limit
+    }).mappings().all()
+
+# SQLite: FTS5 prefix query on every token, ranked by bm25 with name weighted highest
+def _search_products_sqlite(term, limit):
+    tokens = re.findall(r'\w+', term)
+    if not tokens:
+        return []
+
+    return db.session.execute(text(f"""
+        SELECT {SEARCH_COLUMNS},
+               lower(p.name) LIKE :prefix ESCAPE '\\' AS prefix_match,
+               -bm25(products_fts, 10.0, 3.0, 3.0, 1.0) AS score
+        FROM products_fts
+        JOIN products p ON p.product_id = products_fts.rowid
+        WHERE products_fts MATCH :match
+        ORDER BY prefix_match DESC, score DESC, p.name
+        LIMIT :limit
+    """), {
+        'match': ' '.join(f'"{token}"*' for token in tokens),
+        'prefix': f'{_like_escape(term)}%',
+        'limit': limit
+    }).mappings().all()
+
+# Other databases: unindexed substring match, kept so search still works in development
+def _search_products_fallback(term, limit):
+    pattern = f'%{_like_escape(term)}%'
+    products = Product.query.filter(or_(
+        Product.name.ilike(pattern, escape='\\'),
+        Product.brand.ilike(pattern, escape='\\'),
+        Product.model.ilike(pattern, escape='\\'),
+        Product.category.ilike(pattern, escape='\\')
+    )).order_by(Product.name).limit(limit).all()
+
+    return [dict(product.to_dict(), prefix_match=product.name.lower().startswith(term), score=None) for product in products]
+
+# Service function to search products by name, brand, model and category
+def search_products(args):
+    try:
+        term = (args.get('q') or '').strip().lower()
+        if not term:
+            return make_response(jsonify({'error': 'Search term q is required'}), 400)
+
+        limit = parse_limit(args, default=10, maximum=50)
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            rows = _search_products_postgresql(term, limit)
+        elif dialect == 'sqlite':
+            rows = _search_products_sqlite(term, limit)
+        else:
+            rows = _search_products_fallback(term, limit)
+
+        results = [
+            {
+                'product_id': row['product_id'],
+                'name': row['name'],
+                'category': row['category'],
+                'product_type': row['product_type'].value if isinstance(row['product_type'], ProductType) else row['product_type'],
+                'brand': row['brand'],
+                'model': row['model'],
+                'prefix_match': bool(row['prefix_match']),
+                'score': round(float(row['score']), 4) if row['score'] is not None else None
+            }
+            for row in rows
+        ]
+
+        return make_response(jsonify(results), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+
 # Service function to get a single product by ID
 def get_product_by_id(product_id):
     product = Product.query.get(product_id)
@@ -185,4 +290,128 @@ def get_product_by_id(product_id):
     if product:
         return make_response(jsonify(product.to_dict()), 200)
 
-    return make_response(jsonify({'message': 'Product not found'}), 404)
\ No newline at end of file
+    return make_response(jsonify({'message': 'Product not found'}), 404)
+
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FIELDS = ('name', 'category', 'product_type', 'brand', 'model')
+
+# Parse an import payload into row dicts: CSV with a header row, JSON lines, or a JSON array
+def _parse_import_rows(payload, import_format):
+    if import_format == 'csv':
+        return list(csv.DictReader(io.StringIO(payload)))
+    if import_format == 'jsonl':
+        return [json.loads(line) for line in payload.splitlines() if line.strip()]
+    rows = json.loads(payload)
+    if not isinstance(rows, list):
+        raise ValueError('JSON imports must be an array of products')
+    return rows
+
+def _validate_import_row(row):
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+
+    # Blank strings (empty CSV cells) count as missing values
+    values = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        values[field] = value
+
+    if not values['name']:
+        return None, 'Product name is required'
+    if not values['category']:
+        return None, 'Product category is required'
+    if values['product_type'] not in [item.value for item in ProductType]:
+        return None, 'Invalid or missing product type'
+    for field in IMPORT_FIELDS:
+        if values[field] is not None and len(str(values[field])) > 100:
+            return None, f'{field} must be at most 100 characters'
+
+    values['product_type'] = ProductType(values['product_type'])
+    return values, None
+
+# Multi-row insert that skips names already taken under products_name_unique, returning the inserted names
+def _insert_products(rows):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(Product).on_conflict_do_nothing(constraint='products_name_unique')
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(Product).on_conflict_do_nothing(index_elements=['name'])
+    else:
+        statement = insert(Product)
+
+    return set(db.session.execute(statement.returning(Product.name), rows).scalars())
+
+# Service function to import many products at once
+def import_products(payload, import_format):
+    try:
+        try:
+            rows = _parse_import_rows(payload, import_format)
+        except (ValueError, csv.Error) as e:
+            return make_response(jsonify({'error': f'Could not parse {import_format} payload: {str(e)}'}), 400)
+
+        errors = []
+        valid_rows = []
+        seen_names = set()
+
+        # Row numbers are 1-based data rows, excluding any CSV header
+        for row_number, row in enumerate(rows, start=1):
+            values, error = _validate_import_row(row)
+            if error:
+                errors.append({'row': row_number, 'name': row.get('name') if isinstance(row, dict) else None, 'error': error})
+                continue
+            if values['name'] in seen_names:
+                errors.append({'row': row_number, 'name': values['name'], 'error': 'Duplicate product name in import'})
+                continue
+            seen_names.add(values['name'])
+            valid_rows.append((row_number, values))
+
+        imported = 0
+        for start in range(0, len(valid_rows), IMPORT_BATCH_SIZE):
+            batch = valid_rows[start:start + IMPORT_BATCH_SIZE]
+
+            # Set-wise uniqueness check against the catalog, one query per batch
+            names = [values['name'] for _, values in batch]
+            existing = set(db.session.execute(select(Product.name).where(Product.name.in_(names))).scalars())
+
+            to_insert = []
+            for row_number, values in batch:
+                if values['name'] in existing:
+                    errors.append({'row': row_number, 'name': values['name'], 'error': 'Product with this name already exists'})
+                else:
+                    to_insert.append((row_number, values))
+
+            if not to_insert:
+                continue
+
+            inserted = _insert_products([values for _, values in to_insert])
+            imported += len(inserted)
+
+            # Names created concurrently since the check are skipped by the constraint
+            for row_number, values in to_insert:
+                if values['name'] not in inserted:
+                    errors.append({'row': row_number, 'name': values['name'], 'error': 'Product with this name already exists'})
+
+        db.session.commit()
+        if imported:
+            reference_cache.invalidate('products')
+
+        errors.sort(key=lambda error: error['row'])
+        response_data = {
+            'message': f'Imported {imported} of {len(rows)} products',
+            'imported': imported,
+            'failed': len(errors),
+            'errors': errors
+        }
+
+        return make_response(jsonify(response_data), 201 if imported else 400)
+
+    except IntegrityError as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': 'Database integrity error. Please check the data provided.'}), 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
@@ -1,17 +1,140 @@
 from flask import jsonify, make_response
 from models.productsupplier import ProductSupplier, Status
-from models.supplier import Supplier
+from models.productsupplierprice import ProductSupplierPrice
+from models.supplier import Supplier, SupplierStatus
 from models.products import Product
+from services.scorecardServices import invalidate_supplier_scorecards
 from app import db
 from psycopg2.errors import NumericValueOutOfRange
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import joinedload
+from utils.pagination import parse_limit, parse_int_arg, encode_cursor, decode_cursor
+
+# Largest top-k the cheapest-supplier lookup serves
+BEST_OFFERS_MAX = 10
 
 
 def get_product_suppliers():
-   product_suppliers = ProductSupplier.query.all()
+   product_suppliers = ProductSupplier.query.options(
+       joinedload(ProductSupplier.product),
+       joinedload(ProductSupplier.supplier)
+   ).all()
    product_suppliers_list = [product_supplier.to_dict() for product_supplier in product_suppliers]
    return make_response(jsonify(product_suppliers_list), 200)
 
 
+# Add the current listed price of a pairing to its price history; committed by the caller
+def _record_price(product_supplier):
+    db.session.add(ProductSupplierPrice(
+        product_id=product_supplier.product_id,
+        supplier_id=product_supplier.supplier_id,
+        unit_price=product_supplier.unit_price
+    ))
+
+
+# Give every pairing without any price history a first entry at its current listed price,
+# e.g. for pairings created before the history was recorded. Returns the rows added.
+def backfill_price_history():
+    has_history = select(ProductSupplierPrice.price_id)\
+        .where(
+            ProductSupplierPrice.product_id == ProductSupplier.product_id,
+            ProductSupplierPrice.supplier_id == ProductSupplier.supplier_id
+        )\
+        .exists()
+
+    result = db.session.execute(
+        insert(ProductSupplierPrice).from_select(
+            ['product_id', 'supplier_id', 'unit_price', 'effective_at'],
+            select(
+                ProductSupplier.product_id,
+                ProductSupplier.supplier_id,
+                ProductSupplier.unit_price,
+                func.coalesce(ProductSupplier.updated_at, ProductSupplier.created_at)
+            ).where(~has_history)
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+# The top-k active offers for a product from active suppliers, cheapest first
+def _load_best_offers(product_id, limit):
+    offers = db.session.query(
+        ProductSupplier.product_supplier_id,
+        ProductSupplier.supplier_id,
+        Supplier.supplier_name,
+        ProductSupplier.unit_price
+    ).join(Supplier, ProductSupplier.supplier_id == Supplier.supplier_id)\
+        .filter(
+            ProductSupplier.product_id == product_id,
+            ProductSupplier.status == Status.active,
+            Supplier.status == SupplierStatus.active
+        )\
+        .order_by(ProductSupplier.unit_price, ProductSupplier.product_supplier_id)\
+        .limit(limit)\
+        .all()
+
+    return [
+        {
+            'product_supplier_id': product_supplier_id,
+            'supplier_id': supplier_id,
+            'supplier_name': supplier_name,
+            'unit_price': str(unit_price)
+        }
+        for product_supplier_id, supplier_id, supplier_name, unit_price in offers
+    ]
+
+
+# Service function to get the cheapest active supplier and the top-k offers for a product
+def get_best_suppliers(product_id, args):
+    try:
+        limit = parse_limit(args, default=3, maximum=BEST_OFFERS_MAX)
+
+        # Read straight off the active price index on every request, so a price change made
+        # through any worker is visible at once
+        offers = _load_best_offers(product_id, limit)
+
+        return make_response(jsonify({
+            'product_id': product_id,
+            'cheapest': offers[0] if offers else None,
+            'suppliers': offers
+        }), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+
+# Service function to get the listed price history of a product, newest first
+def get_price_history(product_id, args):
+    try:
+        limit = parse_limit(args)
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None and not isinstance(cursor, int):
+            raise ValueError('Invalid cursor')
+
+        query = ProductSupplierPrice.query.options(joinedload(ProductSupplierPrice.supplier))\
+            .filter(ProductSupplierPrice.product_id == product_id)
+
+        supplier_id = parse_int_arg(args, 'supplier_id')
+        if supplier_id is not None:
+            query = query.filter(ProductSupplierPrice.supplier_id == supplier_id)
+        if cursor is not None:
+            query = query.filter(ProductSupplierPrice.price_id < cursor)
+
+        prices = query.order_by(ProductSupplierPrice.price_id.desc()).limit(limit + 1).all()
+        has_more = len(prices) > limit
+        prices = prices[:limit]
+
+        return make_response(jsonify({
+            'product_id': product_id,
+            'prices': [price.to_dict() for price in prices],
+            'next_cursor': encode_cursor(prices[-1].price_id) if has_more else None
+        }), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+
 def create_product_supplier(data):
     try:
         # Extract data from the request
@@ -54,7 +177,9 @@ def create_product_supplier(data):
         )
 
         db.session.add(new_product_supplier)
+        _record_price(new_product_supplier)
         db.session.commit()
+        invalidate_supplier_scorecards()
 
         # Prepare response data
         product_supplier_response = new_product_supplier.to_dict()
@@ -123,14 +248,25 @@ def update_product_supplier(product_supplier_id, data):
         if existing_product_supplier and existing_product_supplier.product_supplier_id != product_supplier_id:
             return make_response(jsonify({'error': 'This product is already associated with this supplier'}), 400)
 
+        # A new price, or the pairing moving to another product or supplier, starts a history entry
+        previous_product_id = product_supplier.product_id
+        price_changed = (
+            product_supplier.product_id != product_id or
+            product_supplier.supplier_id != supplier_id or
+            product_supplier.unit_price != unit_price
+        )
+
         # Update the product supplier details
         product_supplier.product_id = product_id
         product_supplier.supplier_id = supplier_id
         product_supplier.unit_price = unit_price
         product_supplier.status = Status(status)
+        if price_changed:
+            _record_price(product_supplier)
 
         # Commit the changes to the database
         db.session.commit()
+        invalidate_supplier_scorecards()
 
         # Prepare response data
         product_supplier_response = product_supplier.to_dict()
@@ -153,6 +289,7 @@ def toggle_product_supplier_status(product_supplier_id):
         product_supplier.status = Status.inactive if product_supplier.status == Status.active else Status.active
 
         db.session.commit()
+        invalidate_supplier_scorecards()
 
         product_supplier_response = product_supplier.to_dict()
 
@@ -172,6 +309,7 @@ def delete_product_supplier(product_supplier_id):
             return make_response(jsonify({'error': 'Product Supplier not found'}), 404)
         db.session.delete(product_supplier)
         db.session.commit()
+        invalidate_supplier_scorecards()
 
         return make_response(jsonify({'message': 'Product Supplier deleted successfully'}), 200)
 
@@ -1,9 +1,21 @@
 from flask import request, jsonify, make_response
 from models.purchase import PurchaseRequest, PurchaseRequestStatusEnum
+from models.purchaserollup import ApprovedPurchaseCount, ApprovedPurchaseTotal
 from models.products import Product
 from models.supplier import Supplier
 from app import db
-from sqlalchemy import func
+from sqlalchemy import delete, func, select, insert, text, tuple_
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import pytz
+from services.scorecardServices import invalidate_supplier_scorecards
+from utils.cache import report_cache
+from utils.export import stream_export
+from utils.pagination import parse_limit, parse_int_arg, encode_cursor, decode_cursor
+from utils.dates import parse_datetime_arg
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
 
 # Service function to create a new purchase request
 def create_purchase_request(data):
@@ -58,6 +70,8 @@ def create_purchase_request(data):
 
         db.session.add(new_request)
         db.session.commit()
+        invalidate_supplier_scorecards(new_request.supplier_id)
+        report_cache.clear()
 
         # Response data
         request_response = {
@@ -83,17 +97,264 @@ def create_purchase_request(data):
         return make_response(jsonify({'error': str(e)}), 500)
 
 
-# Service function to get all purchase requests
-def get_purchase_requests():
-    purchase_requests = PurchaseRequest.query.all()
-    purchase_requests_list = [purchase_request.to_dict() for purchase_request in purchase_requests]
+# Service function to create a multi-line purchase order in one transaction
+def create_purchase_requests_batch(data):
+    try:
+        items = data.get('items') if data else None
+        if not items or not isinstance(items, list):
+            return make_response(jsonify({'error': 'Items are required'}), 400)
+
+        # Validate every line before touching the database
+        errors = []
+        lines = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'line': index, 'error': 'Line must be an object'})
+                continue
+
+            product_id = item.get('product_id')
+            supplier_id = item.get('supplier_id')
+
+            if not product_id:
+                errors.append({'line': index, 'error': 'Product ID is required'})
+                continue
+            if not supplier_id:
+                errors.append({'line': index, 'error': 'Supplier ID is required'})
+                continue
+
+            # The name lookups below are keyed by integer id, so "3" must become 3
+            try:
+                product_id = int(product_id)
+                supplier_id = int(supplier_id)
+            except (TypeError, ValueError):
+                errors.append({'line': index, 'error': 'Product ID and supplier ID must be valid integers'})
+                continue
+
+            try:
+                unit_price = Decimal(str(item.get('unit_price')))
+                if not unit_price.is_finite():
+                    raise InvalidOperation
+            except InvalidOperation:
+                errors.append({'line': index, 'error': 'Unit price must be a valid number'})
+                continue
+
+            try:
+                quantity = int(item.get('quantity'))
+            except (TypeError, ValueError):
+                errors.append({'line': index, 'error': 'Quantity must be a valid integer'})
+                continue
+
+            if unit_price <= 0:
+                errors.append({'line': index, 'error': 'Unit price must be greater than 0'})
+                continue
+            if quantity <= 0:
+                errors.append({'line': index, 'error': 'Quantity must be greater than 0'})
+                continue
 
-    return make_response(jsonify(purchase_requests_list), 200)
+            lines.append((index, product_id, supplier_id, unit_price, quantity))
+
+        # One lookup each for every referenced product and supplier
+        product_names = dict(db.session.query(Product.product_id, Product.name)
+                             .filter(Product.product_id.in_({line[1] for line in lines})))
+        supplier_names = dict(db.session.query(Supplier.supplier_id, Supplier.supplier_name)
+                              .filter(Supplier.supplier_id.in_({line[2] for line in lines})))
+
+        for index, product_id, supplier_id, _, _ in lines:
+            if product_id not in product_names:
+                errors.append({'line': index, 'error': 'Product not found'})
+            elif supplier_id not in supplier_names:
+                errors.append({'line': index, 'error': 'Supplier not found'})
+
+        if errors:
+            errors.sort(key=lambda error: error['line'])
+            return make_response(jsonify({'error': 'Invalid purchase order lines', 'details': errors}), 400)
+
+        # Bulk inserts skip the before_insert listener, so total_amount is computed here
+        request_date = datetime.now(MANILA_TZ)
+        rows = [
+            {
+                'product_id': product_id,
+                'supplier_id': supplier_id,
+                'unit_price': unit_price,
+                'quantity': quantity,
+                'total_amount': unit_price * quantity,
+                'status': PurchaseRequestStatusEnum.pending,
+                'request_date': request_date
+            }
+            for _, product_id, supplier_id, unit_price, quantity in lines
+        ]
+
+        request_ids = db.session.execute(
+            insert(PurchaseRequest).returning(PurchaseRequest.request_id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        db.session.commit()
+        invalidate_supplier_scorecards(*{supplier_id for _, _, supplier_id, _, _ in lines})
+        report_cache.clear()
+
+        purchase_requests = [
+            {
+                'request_id': request_id,
+                'product_id': row['product_id'],
+                'product_name': product_names[row['product_id']],
+                'supplier_id': row['supplier_id'],
+                'supplier_name': supplier_names[row['supplier_id']],
+                'unit_price': str(row['unit_price'].quantize(Decimal('0.01'))),
+                'quantity': row['quantity'],
+                'total_amount': str(row['total_amount'].quantize(Decimal('0.01'))),
+                'status': row['status'].value,
+                'request_date': request_date.isoformat()
+            }
+            for request_id, row in zip(request_ids, rows)
+        ]
+
+        return make_response(jsonify({
+            'message': f'{len(purchase_requests)} purchase requests created successfully',
+            'purchase_requests': purchase_requests
+        }), 201)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+PURCHASE_SORT_COLUMNS = {
+    'request_date': PurchaseRequest.request_date,
+    'request_id': PurchaseRequest.request_id,
+    # Legacy rows may hold a NULL total; coalesce so the keyset comparison never meets NULL
+    'total_amount': func.coalesce(PurchaseRequest.total_amount, 0)
+}
+
+def _sort_value_to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _sort_value_from_json(sort, value):
+    if sort == 'request_date':
+        return datetime.fromisoformat(value)
+    if sort == 'total_amount':
+        return Decimal(value)
+    return int(value)
+
+# Service function to get one page of purchase requests, filtered and keyset-paginated
+def get_purchase_requests(args):
+    try:
+        limit = parse_limit(args)
+
+        sort = args.get('sort', 'request_date')
+        if sort not in PURCHASE_SORT_COLUMNS:
+            raise ValueError(f"sort must be one of: {', '.join(PURCHASE_SORT_COLUMNS)}")
+        order = args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            raise ValueError('order must be asc or desc')
+
+        query = PurchaseRequest.query.options(
+            joinedload(PurchaseRequest.product),
+            joinedload(PurchaseRequest.supplier)
+        )
+
+        status = args.get('status')
+        if status:
+            if status not in [item.value for item in PurchaseRequestStatusEnum]:
+                raise ValueError('Invalid status')
+            query = query.filter(PurchaseRequest.status == PurchaseRequestStatusEnum(status))
+
+        supplier_id = parse_int_arg(args, 'supplier_id')
+        if supplier_id is not None:
+            query = query.filter(PurchaseRequest.supplier_id == supplier_id)
+
+        product_id = parse_int_arg(args, 'product_id')
+        if product_id is not None:
+            query = query.filter(PurchaseRequest.product_id == product_id)
+
+        start_date = parse_datetime_arg(args.get('start_date'), 'start_date')
+        if start_date:
+            query = query.filter(PurchaseRequest.request_date >= start_date)
+
+        end_date = parse_datetime_arg(args.get('end_date'), 'end_date')
+        if end_date:
+            query = query.filter(PurchaseRequest.request_date <= end_date)
+
+        # request_id breaks ties, so the (sort column, request_id) key is unique
+        sort_column = PURCHASE_SORT_COLUMNS[sort]
+        sort_key = tuple_(sort_column, PurchaseRequest.request_id) if sort != 'request_id' else PurchaseRequest.request_id
+
+        cursor = decode_cursor(args.get('cursor'))
+        if cursor is not None:
+            try:
+                if sort == 'request_id':
+                    after = int(cursor)
+                else:
+                    after = tuple_(_sort_value_from_json(sort, cursor[0]), int(cursor[1]))
+            except (TypeError, ValueError, IndexError, ArithmeticError):
+                raise ValueError('Invalid cursor')
+            query = query.filter(sort_key > after if order == 'asc' else sort_key < after)
+
+        if order == 'asc':
+            query = query.order_by(sort_column.asc(), PurchaseRequest.request_id.asc())
+        else:
+            query = query.order_by(sort_column.desc(), PurchaseRequest.request_id.desc())
+
+        purchase_requests = query.limit(limit + 1).all()
+        has_more = len(purchase_requests) > limit
+        purchase_requests = purchase_requests[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = purchase_requests[-1]
+            if sort == 'request_id':
+                next_cursor = encode_cursor(last.request_id)
+            else:
+                sort_value = getattr(last, sort)
+                if sort == 'total_amount' and sort_value is None:
+                    sort_value = Decimal('0')
+                next_cursor = encode_cursor([_sort_value_to_json(sort_value), last.request_id])
+
+        response_data = {
+            'purchase_requests': [purchase_request.to_dict() for purchase_request in purchase_requests],
+            'next_cursor': next_cursor
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+
+# Service function to stream every purchase request as CSV or NDJSON
+def export_purchase_requests(args):
+    try:
+        statement = select(
+            PurchaseRequest.request_id,
+            PurchaseRequest.product_id,
+            Product.name.label('product_name'),
+            Product.brand,
+            Product.model,
+            PurchaseRequest.supplier_id,
+            Supplier.supplier_name,
+            PurchaseRequest.unit_price,
+            PurchaseRequest.quantity,
+            PurchaseRequest.total_amount,
+            PurchaseRequest.status,
+            PurchaseRequest.request_date
+        ).join(Product, PurchaseRequest.product_id == Product.product_id)\
+            .join(Supplier, PurchaseRequest.supplier_id == Supplier.supplier_id)\
+            .order_by(PurchaseRequest.request_id)
+
+        return stream_export(statement, 'purchase_requests', args.get('format', 'csv'))
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
 
 
 # # Service function to get 5 recent purchase requests
 def get_recent_purchase_requests():
-    recent_purchase_requests = PurchaseRequest.query.order_by(PurchaseRequest.request_id.desc()).limit(5).all()
+    recent_purchase_requests = PurchaseRequest.query\
+        .options(joinedload(PurchaseRequest.product), joinedload(PurchaseRequest.supplier))\
+        .order_by(PurchaseRequest.request_id.desc()).limit(5).all()
     recent_purchase_requests_list = [purchase_request.to_dict() for purchase_request in recent_purchase_requests]
 
     return make_response(jsonify(recent_purchase_requests_list), 200)
@@ -109,6 +370,8 @@ def delete_purchase_request(request_id):
 
         db.session.delete(purchase_request)
         db.session.commit()
+        invalidate_supplier_scorecards(purchase_request.supplier_id)
+        report_cache.clear()
 
         return jsonify({'message': 'Purchase request cancelled successfully'}), 200
 
@@ -116,32 +379,92 @@ def delete_purchase_request(request_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-# Service function to get top 10 products based on the number of approved purchase requests
-def get_top_10_products_by_approved_requests():
+# Recompute approved_purchase_counts and approved_purchase_totals from purchase_requests,
+# e.g. to backfill after deploying them
+def rebuild_approved_purchase_counts():
+    # Approvals committed while the counters are rebuilt would be counted twice or lost,
+    # so hold off the listeners' upserts until this transaction ends
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text(
+            'LOCK TABLE approved_purchase_counts, approved_purchase_totals IN SHARE ROW EXCLUSIVE MODE'
+        ))
+
+    request_day = func.date(PurchaseRequest.request_date)
+    counts = select(
+        PurchaseRequest.product_id,
+        request_day,
+        func.count(PurchaseRequest.request_id)
+    ).where(PurchaseRequest.status == PurchaseRequestStatusEnum.approved)\
+        .group_by(PurchaseRequest.product_id, request_day)
+
+    db.session.execute(delete(ApprovedPurchaseCount))
+    db.session.execute(delete(ApprovedPurchaseTotal))
+    result = db.session.execute(
+        insert(ApprovedPurchaseCount).from_select(
+            ['product_id', 'request_day', 'approved_count'],
+            counts
+        )
+    )
+    db.session.execute(
+        insert(ApprovedPurchaseTotal).from_select(
+            ['product_id', 'approved_count'],
+            select(ApprovedPurchaseCount.product_id, func.sum(ApprovedPurchaseCount.approved_count))
+            .group_by(ApprovedPurchaseCount.product_id)
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+# Service function to get the top N products by approved purchase requests, optionally within a date window
+def get_top_products_by_approved_requests(args):
     try:
-        # Query to get the top 10 products with the highest number of approved purchase requests
-        top_10_products = db.session.query(
-            PurchaseRequest.product_id,
-            Product.name,
-            func.count(PurchaseRequest.request_id).label('total_purchases')
-        ).join(Product, PurchaseRequest.product_id == Product.product_id)\
-        .filter(PurchaseRequest.status == PurchaseRequestStatusEnum.approved)\
-        .group_by(PurchaseRequest.product_id, Product.name)\
-        .order_by(func.count(PurchaseRequest.request_id).desc())\
-        .limit(10).all()
+        limit = parse_limit(args, default=10, maximum=100)
+        start_date = parse_datetime_arg(args.get('start_date'), 'start_date')
+        end_date = parse_datetime_arg(args.get('end_date'), 'end_date')
 
-        if not top_10_products:
+        if start_date or end_date:
+            # Sums the per-day counters inside the window, which are far smaller than the request history
+            total_purchases = func.sum(ApprovedPurchaseCount.approved_count)
+            query = db.session.query(
+                ApprovedPurchaseCount.product_id,
+                Product.name,
+                total_purchases.label('total_purchases')
+            ).join(Product, ApprovedPurchaseCount.product_id == Product.product_id)
+            if start_date:
+                query = query.filter(ApprovedPurchaseCount.request_day >= start_date.date())
+            if end_date:
+                query = query.filter(ApprovedPurchaseCount.request_day <= end_date.date())
+
+            top_products = query.group_by(ApprovedPurchaseCount.product_id, Product.name)\
+                .having(total_purchases > 0)\
+                .order_by(total_purchases.desc(), ApprovedPurchaseCount.product_id)\
+                .limit(limit).all()
+        else:
+            # All time: the first rows of the per-product totals' rank index
+            top_products = db.session.query(
+                ApprovedPurchaseTotal.product_id,
+                Product.name,
+                ApprovedPurchaseTotal.approved_count
+            ).join(Product, ApprovedPurchaseTotal.product_id == Product.product_id)\
+                .filter(ApprovedPurchaseTotal.approved_count > 0)\
+                .order_by(ApprovedPurchaseTotal.approved_count.desc(), ApprovedPurchaseTotal.product_id)\
+                .limit(limit).all()
+
+        if not top_products:
             return make_response(jsonify({'message': 'No approved purchase requests found'}), 404)
 
-        top_10_products_list = [
+        top_products_list = [
             {
                 'product_id': product_id,
                 'product_name': product_name,
-                'total_purchases': total_purchases
-            } for product_id, product_name, total_purchases in top_10_products
+                'total_purchases': int(total_purchases)
+            } for product_id, product_name, total_purchases in top_products
         ]
 
-        return make_response(jsonify(top_10_products_list), 200)
+        return make_response(jsonify(top_products_list), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
 
     except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 500)
\ No newline at end of file
+        return make_response(jsonify({'error': str(e)}), 500)
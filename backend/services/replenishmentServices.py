@@ -0,0 +1,252 @@
+from flask import jsonify, make_response
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.inventory import Inventory
+from models.departmentrequest import DepartmentRequest
+from models.productsupplier import ProductSupplier, Status
+from models.supplier import Supplier, SupplierStatus
+from models.purchase import PurchaseRequest, PurchaseRequestStatusEnum
+from services.scorecardServices import invalidate_supplier_scorecards
+from utils.cache import report_cache
+from app import db
+from sqlalchemy import and_, case, func, insert, select, update
+
+DEFAULT_DEMAND_WINDOW_DAYS = 30
+DEFAULT_COVER_DAYS = 14
+# Transaction-scoped advisory lock key held while a planner run reads and inserts drafts
+REPLENISHMENT_LOCK_KEY = 7_341_001
+
+def _parse_days(data, name, default):
+    value = data.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a valid integer')
+    if value <= 0:
+        raise ValueError(f'{name} must be greater than 0')
+    return value
+
+# JSON true/false, or the strings "true"/"false"/"1"/"0"; anything else is rejected
+def _parse_flag(data, name):
+    value = data.get(name, False)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', '1'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('false', '0'):
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+# Serialise planner runs: a second run waits here until the first commits its drafts, then
+# counts them as on order. The lock is released when the transaction ends.
+def _lock_planner():
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(select(func.pg_advisory_xact_lock(REPLENISHMENT_LOCK_KEY)))
+
+# Read everything the planner needs for the whole catalog in one statement: stock and
+# planning settings, consumption over the window, quantity already on order and the
+# cheapest active offer. Only products at or below their reorder point are returned.
+def _planning_rows(window_days):
+    since = datetime.now() - timedelta(days=window_days)
+
+    demand = select(
+        DepartmentRequest.product_id,
+        func.sum(DepartmentRequest.quantity).label('consumed')
+    ).where(DepartmentRequest.request_date >= since)\
+        .group_by(DepartmentRequest.product_id)\
+        .subquery()
+
+    # Drafts count as on order, so running the planner twice does not order twice
+    on_order = select(
+        PurchaseRequest.product_id,
+        func.sum(PurchaseRequest.quantity).label('on_order')
+    ).where(PurchaseRequest.status.in_([PurchaseRequestStatusEnum.draft, PurchaseRequestStatusEnum.pending]))\
+        .group_by(PurchaseRequest.product_id)\
+        .subquery()
+
+    offers = select(
+        ProductSupplier.product_id,
+        ProductSupplier.supplier_id,
+        ProductSupplier.unit_price,
+        func.row_number().over(
+            partition_by=ProductSupplier.product_id,
+            order_by=(ProductSupplier.unit_price, ProductSupplier.product_supplier_id)
+        ).label('price_rank')
+    ).join(Supplier, ProductSupplier.supplier_id == Supplier.supplier_id)\
+        .where(ProductSupplier.status == Status.active, Supplier.status == SupplierStatus.active)\
+        .subquery()
+
+    consumed = func.coalesce(demand.c.consumed, 0)
+    ordered = func.coalesce(on_order.c.on_order, 0)
+    demand_point = consumed * Inventory.lead_time_days * 1.0 / window_days + Inventory.safety_stock
+    reorder_point = case(
+        (Inventory.reorder_threshold > demand_point, Inventory.reorder_threshold),
+        else_=demand_point
+    )
+
+    return db.session.execute(
+        select(
+            Inventory.product_id,
+            Inventory.quantity,
+            Inventory.reorder_threshold,
+            Inventory.lead_time_days,
+            Inventory.safety_stock,
+            consumed.label('consumed'),
+            ordered.label('on_order'),
+            offers.c.supplier_id,
+            offers.c.unit_price
+        ).outerjoin(demand, demand.c.product_id == Inventory.product_id)
+        .outerjoin(on_order, on_order.c.product_id == Inventory.product_id)
+        .outerjoin(offers, and_(offers.c.product_id == Inventory.product_id, offers.c.price_rank == 1))
+        .where(Inventory.quantity + ordered <= reorder_point)
+        .order_by(Inventory.product_id)
+    ).all()
+
+# Plan replenishment for every stocked product and, unless dry_run, insert the orders as drafts.
+# reorder point = max(reorder threshold, daily demand x lead time + safety stock);
+# a product at or below it is ordered up to reorder point + daily demand x cover_days.
+def plan_replenishment(window_days=DEFAULT_DEMAND_WINDOW_DAYS, cover_days=DEFAULT_COVER_DAYS, dry_run=False):
+    if not dry_run:
+        _lock_planner()
+
+    lines = []
+    without_supplier = []
+    for row in _planning_rows(window_days):
+        daily_demand = row.consumed / window_days
+        reorder_point = max(row.reorder_threshold, daily_demand * row.lead_time_days + row.safety_stock)
+        position = row.quantity + row.on_order
+        order_quantity = math.ceil(reorder_point + daily_demand * cover_days - position)
+        if order_quantity <= 0:
+            continue
+        if row.supplier_id is None:
+            without_supplier.append(row.product_id)
+            continue
+
+        lines.append({
+            'product_id': row.product_id,
+            'supplier_id': row.supplier_id,
+            'unit_price': row.unit_price,
+            'quantity': order_quantity,
+            'on_hand': row.quantity,
+            'on_order': int(row.on_order),
+            'daily_demand': round(daily_demand, 4),
+            'reorder_point': math.ceil(reorder_point)
+        })
+
+    request_ids = []
+    if not dry_run and not lines:
+        # Nothing to order; end the transaction to release the planner lock
+        db.session.commit()
+    if lines and not dry_run:
+        request_date = datetime.now()
+        request_ids = db.session.execute(
+            insert(PurchaseRequest).returning(PurchaseRequest.request_id, sort_by_parameter_order=True),
+            [
+                {
+                    'product_id': line['product_id'],
+                    'supplier_id': line['supplier_id'],
+                    'unit_price': line['unit_price'],
+                    'quantity': line['quantity'],
+                    'status': PurchaseRequestStatusEnum.draft,
+                    'request_date': request_date,
+                    'total_amount': line['unit_price'] * line['quantity']
+                }
+                for line in lines
+            ]
+        ).scalars().all()
+        db.session.commit()
+        invalidate_supplier_scorecards(*{line['supplier_id'] for line in lines})
+        report_cache.clear()
+
+    for line, request_id in zip(lines, request_ids):
+        line['request_id'] = request_id
+
+    return {
+        'window_days': window_days,
+        'cover_days': cover_days,
+        'dry_run': dry_run,
+        'planned': len(lines),
+        'total_amount': sum((line['unit_price'] * line['quantity'] for line in lines), Decimal('0')),
+        'products_without_supplier': without_supplier,
+        'lines': lines
+    }
+
+# Service function to run the replenishment planner from the API
+def run_replenishment_plan(data):
+    try:
+        data = data or {}
+        window_days = _parse_days(data, 'window_days', DEFAULT_DEMAND_WINDOW_DAYS)
+        cover_days = _parse_days(data, 'cover_days', DEFAULT_COVER_DAYS)
+        dry_run = _parse_flag(data, 'dry_run')
+
+        plan = plan_replenishment(window_days, cover_days, dry_run)
+        plan['total_amount'] = str(plan['total_amount'])
+        for line in plan['lines']:
+            line['unit_price'] = str(line['unit_price'])
+
+        message = 'Replenishment plan computed' if dry_run else 'Draft purchase requests created'
+        return make_response(jsonify({'message': message, 'data': plan}), 200 if dry_run else 201)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to turn reviewed draft purchase requests into pending orders
+def confirm_draft_purchase_requests(data):
+    try:
+        request_ids = (data or {}).get('request_ids')
+        if not request_ids or not isinstance(request_ids, list):
+            return make_response(jsonify({'error': 'request_ids must be a non-empty list'}), 400)
+
+        confirmed = db.session.execute(
+            update(PurchaseRequest)
+            .where(PurchaseRequest.request_id.in_(request_ids), PurchaseRequest.status == PurchaseRequestStatusEnum.draft)
+            .values(status=PurchaseRequestStatusEnum.pending)
+            .returning(PurchaseRequest.request_id, PurchaseRequest.supplier_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        db.session.commit()
+        invalidate_supplier_scorecards(*{supplier_id for _, supplier_id in confirmed})
+        report_cache.clear()
+
+        confirmed_ids = {request_id for request_id, _ in confirmed}
+        response_data = {
+            'confirmed': sorted(confirmed_ids),
+            'not_confirmed': [request_id for request_id in request_ids if request_id not in confirmed_ids]
+        }
+        return make_response(jsonify({'message': 'Draft purchase requests confirmed', 'data': response_data}), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to set the lead time and safety stock the planner uses for a product
+def update_replenishment_settings(product_id, data):
+    try:
+        data = data or {}
+        inventory = Inventory.query.filter_by(product_id=product_id).first()
+        if not inventory:
+            return make_response(jsonify({'error': f'No inventory record found for product_id {product_id}'}), 404)
+
+        for name in ('lead_time_days', 'safety_stock'):
+            if name not in data:
+                continue
+            try:
+                value = int(data[name])
+            except (TypeError, ValueError):
+                return make_response(jsonify({'error': f'{name} must be a valid integer'}), 400)
+            if value < 0:
+                return make_response(jsonify({'error': f'{name} cannot be negative'}), 400)
+            setattr(inventory, name, value)
+
+        db.session.commit()
+
+        return make_response(jsonify({'message': 'Replenishment settings updated successfully', 'inventory': inventory.to_dict()}), 200)
+
+    except Exception as e:
+        db.session.rollback()
+        return make_response(jsonify({'error': str(e)}), 500)
@@ -0,0 +1,209 @@
+from flask import jsonify, make_response
+from decimal import Decimal
+from models.supplier import Supplier
+from models.products import Product
+from models.productsupplier import ProductSupplier, Status
+from models.purchase import PurchaseRequest, PurchaseRequestStatusEnum
+from models.evaluate import Evaluation
+from models.damage import DamagedItem, ReturnStatusEnum
+from app import db
+from sqlalchemy import case, func, select, true
+from utils.cache import scorecard_cache
+
+# Additive totals behind every scorecard; rates and averages are derived from them at the end
+SCORECARD_TOTALS = (
+    'purchase_requests', 'approved_requests', 'approved_quantity', 'spend',
+    'list_value', 'price_difference', 'undamaged_quantity', 'damaged_quantity',
+    'damaged_items', 'pending_items', 'replaced_items', 'rejected_items', 'replacement_seconds'
+)
+
+# Scorecards are cached one entry per supplier; the full list is assembled from them
+def _scorecard_key(supplier_id):
+    return ('supplier_scorecard', supplier_id)
+
+# Drop the cached scorecards of suppliers whose purchases, evaluations or damages changed;
+# the next list read rebuilds only those. With no arguments every scorecard is dropped,
+# e.g. after a listed price changes.
+def invalidate_supplier_scorecards(*supplier_ids):
+    if supplier_ids:
+        scorecard_cache.invalidate(*[_scorecard_key(supplier_id) for supplier_id in supplier_ids])
+    else:
+        scorecard_cache.clear()
+
+def _seconds_between(start, end):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.extract('epoch', end - start)
+
+# One grouped query per source table, each keyed by (supplier_id, product_id).
+# supplier_ids of None aggregates every supplier.
+def _aggregate(supplier_ids=None):
+    in_scope = PurchaseRequest.supplier_id.in_(supplier_ids) if supplier_ids is not None else true()
+    approved = PurchaseRequest.status == PurchaseRequestStatusEnum.approved
+
+    # The benchmark price of a product is its average listed price across active suppliers
+    list_prices = select(
+        ProductSupplier.product_id,
+        func.avg(ProductSupplier.unit_price).label('list_price')
+    ).where(ProductSupplier.status == Status.active)\
+        .group_by(ProductSupplier.product_id)\
+        .subquery()
+    benchmarked = approved & list_prices.c.list_price.isnot(None)
+
+    purchases = select(
+        PurchaseRequest.supplier_id,
+        PurchaseRequest.product_id,
+        func.count(PurchaseRequest.request_id).label('purchase_requests'),
+        func.sum(case((approved, 1), else_=0)).label('approved_requests'),
+        func.sum(case((approved, PurchaseRequest.quantity), else_=0)).label('approved_quantity'),
+        func.sum(case((approved, PurchaseRequest.total_amount), else_=0)).label('spend'),
+        func.sum(case((benchmarked, list_prices.c.list_price * PurchaseRequest.quantity), else_=0)).label('list_value'),
+        func.sum(case(
+            (benchmarked, (PurchaseRequest.unit_price - list_prices.c.list_price) * PurchaseRequest.quantity),
+            else_=0
+        )).label('price_difference')
+    ).outerjoin(list_prices, list_prices.c.product_id == PurchaseRequest.product_id)\
+        .where(in_scope)\
+        .group_by(PurchaseRequest.supplier_id, PurchaseRequest.product_id)
+
+    evaluations = select(
+        PurchaseRequest.supplier_id,
+        PurchaseRequest.product_id,
+        func.sum(Evaluation.undamaged_quantity).label('undamaged_quantity'),
+        func.sum(Evaluation.damaged_quantity).label('damaged_quantity')
+    ).join(PurchaseRequest, Evaluation.request_id == PurchaseRequest.request_id)\
+        .where(in_scope)\
+        .group_by(PurchaseRequest.supplier_id, PurchaseRequest.product_id)
+
+    # A replaced item's updated_at is the moment it was marked replaced
+    replaced = DamagedItem.return_status == ReturnStatusEnum.replaced
+    damages = select(
+        PurchaseRequest.supplier_id,
+        PurchaseRequest.product_id,
+        func.count(DamagedItem.damaged_item_id).label('damaged_items'),
+        func.sum(case((DamagedItem.return_status == ReturnStatusEnum.pending, 1), else_=0)).label('pending_items'),
+        func.sum(case((replaced, 1), else_=0)).label('replaced_items'),
+        func.sum(case((DamagedItem.return_status == ReturnStatusEnum.rejected, 1), else_=0)).label('rejected_items'),
+        func.sum(case(
+            (replaced, _seconds_between(DamagedItem.created_at, DamagedItem.updated_at)),
+            else_=0
+        )).label('replacement_seconds')
+    ).join(Evaluation, DamagedItem.evaluation_id == Evaluation.evaluation_id)\
+        .join(PurchaseRequest, Evaluation.request_id == PurchaseRequest.request_id)\
+        .where(in_scope)\
+        .group_by(PurchaseRequest.supplier_id, PurchaseRequest.product_id)
+
+    totals = {}
+    for statement in (purchases, evaluations, damages):
+        for row in db.session.execute(statement).mappings():
+            entry = totals.setdefault((row['supplier_id'], row['product_id']), dict.fromkeys(SCORECARD_TOTALS, 0))
+            for name in SCORECARD_TOTALS:
+                if name in row and row[name] is not None:
+                    entry[name] = row[name]
+    return totals
+
+def _ratio(numerator, denominator, places=4):
+    return round(float(numerator) / float(denominator), places) if denominator else None
+
+# Turn additive totals into the published scorecard metrics
+def _metrics(totals):
+    delivered = totals['undamaged_quantity'] + totals['damaged_quantity']
+    replacement_seconds = _ratio(totals['replacement_seconds'], totals['replaced_items'])
+    price_variance = _ratio(totals['price_difference'], totals['list_value'])
+    return {
+        'purchase_requests': int(totals['purchase_requests']),
+        'approved_requests': int(totals['approved_requests']),
+        'approved_quantity': int(totals['approved_quantity']),
+        'spend': str(Decimal(totals['spend']).quantize(Decimal('0.01'))),
+        'delivered_quantity': int(delivered),
+        'damaged_quantity': int(totals['damaged_quantity']),
+        'damage_rate': _ratio(totals['damaged_quantity'], delivered),
+        'damaged_items': {
+            'total': int(totals['damaged_items']),
+            'pending': int(totals['pending_items']),
+            'replaced': int(totals['replaced_items']),
+            'rejected': int(totals['rejected_items'])
+        },
+        'avg_replacement_hours': round(replacement_seconds / 3600, 2) if replacement_seconds is not None else None,
+        # Weighted deviation of approved unit prices from the product's average listed price
+        'price_variance_pct': round(price_variance * 100, 2) if price_variance is not None else None
+    }
+
+# Compute scorecards for the given suppliers, or every supplier, in supplier_id order
+def _build_scorecards(supplier_ids=None):
+    query = db.session.query(Supplier.supplier_id, Supplier.supplier_name)
+    if supplier_ids is not None:
+        query = query.filter(Supplier.supplier_id.in_(supplier_ids))
+    suppliers = dict(query)
+    totals = _aggregate(list(suppliers) if supplier_ids is not None else None)
+    product_names = dict(
+        db.session.query(Product.product_id, Product.name)
+        .filter(Product.product_id.in_({product_id for _, product_id in totals}))
+    )
+
+    # Supplier totals are the sums of their per-product totals
+    supplier_totals = {supplier_id: dict.fromkeys(SCORECARD_TOTALS, 0) for supplier_id in suppliers}
+    products = {supplier_id: [] for supplier_id in suppliers}
+    for (supplier_id, product_id), entry in sorted(totals.items()):
+        for name in SCORECARD_TOTALS:
+            supplier_totals[supplier_id][name] += entry[name]
+        products[supplier_id].append({
+            'product_id': product_id,
+            'product_name': product_names.get(product_id),
+            **_metrics(entry)
+        })
+
+    scorecards = {}
+    for supplier_id, supplier_name in suppliers.items():
+        scorecards[supplier_id] = {
+            'supplier_id': supplier_id,
+            'supplier_name': supplier_name,
+            **_metrics(supplier_totals[supplier_id]),
+            'products': products[supplier_id]
+        }
+    return [scorecards[supplier_id] for supplier_id in sorted(scorecards)]
+
+# Service function to get the quality scorecard of every supplier
+def get_supplier_scorecards(args):
+    try:
+        supplier_ids = db.session.scalars(select(Supplier.supplier_id).order_by(Supplier.supplier_id)).all()
+        cached = {supplier_id: scorecard_cache.get(_scorecard_key(supplier_id)) for supplier_id in supplier_ids}
+
+        # Aggregate only the suppliers whose entries were dropped or expired; a cold cache
+        # aggregates everyone in one pass instead of through a long IN list
+        missing = [supplier_id for supplier_id, scorecard in cached.items() if scorecard is None]
+        if missing:
+            for scorecard in _build_scorecards(missing if len(missing) < len(supplier_ids) else None):
+                cached[scorecard['supplier_id']] = scorecard
+                scorecard_cache.set(_scorecard_key(scorecard['supplier_id']), scorecard)
+
+        # A supplier deleted since the id query has no scorecard and is left out
+        scorecards = [cached[supplier_id] for supplier_id in supplier_ids if cached[supplier_id] is not None]
+
+        # The per-product breakdown is only included on request
+        if args.get('products', 'false').lower() != 'true':
+            scorecards = [
+                {name: value for name, value in scorecard.items() if name != 'products'}
+                for scorecard in scorecards
+            ]
+
+        return make_response(jsonify({'suppliers': scorecards}), 200)
+
+    except Exception as e:
+        return make_response(jsonify({'error': str(e)}), 500)
+
+# Service function to get the quality scorecard of one supplier, broken down per product
+def get_supplier_scorecard(supplier_id):
+    try:
+        scorecard = scorecard_cache.get(_scorecard_key(supplier_id))
+        if scorecard is None:
+            scorecards = _build_scorecards([supplier_id])
+            if not scorecards:
+                return make_response(jsonify({'message': 'Supplier not found'}), 404)
+            scorecard = scorecards[0]
+            scorecard_cache.set(_scorecard_key(supplier_id), scorecard)
+
+        return make_response(jsonify(scorecard), 200)
+
+    except Exception as e:
+        return make_response(jsonify({'error': str(e)}), 500)
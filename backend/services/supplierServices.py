@@ -2,17 +2,21 @@ from flask import request, jsonify, make_response
 from models.supplier import Supplier, SupplierStatus
 from app import db
 from sqlalchemy.exc import IntegrityError
+from services.scorecardServices import invalidate_supplier_scorecards
+from utils.cache import reference_cache, report_cache
+from utils.etag import collection_version
 
 # Service function to get all suppliers
 def get_suppliers():
-    # Query suppliers and order by supplier_id in ascending order
-    suppliers = Supplier.query.order_by(Supplier.supplier_id.asc()).all()
-    supplier_list = [supplier.to_dict() for supplier in suppliers] 
-    total_suppliers = len(suppliers)
+    # Serve the serialized list from the cache, querying and ordering by supplier_id on a miss.
+    # Keyed to the ETag's collection version so the body always matches the tag sent with it.
+    supplier_list = reference_cache.get_or_load_versioned('suppliers', collection_version(Supplier.updated_at), lambda: [
+        supplier.to_dict() for supplier in Supplier.query.order_by(Supplier.supplier_id.asc()).all()
+    ])
 
     # Include the total number of suppliers in the response
     response = {
-        "total_suppliers": total_suppliers,
+        "total_suppliers": len(supplier_list),
         "suppliers": supplier_list
     }
 
@@ -61,6 +65,8 @@ def create_supplier(data):
         )
         db.session.add(new_supplier)
         db.session.commit()
+        reference_cache.invalidate('suppliers')
+        report_cache.clear()
 
         # Prepare response data
         supplier_response = {
@@ -124,6 +130,8 @@ def update_supplier(supplier_id, data):
             supplier.status = SupplierStatus(status)
 
         db.session.commit()
+        reference_cache.invalidate('suppliers')
+        invalidate_supplier_scorecards(supplier.supplier_id)
 
         # Prepare response data
         supplier_response = {
@@ -152,6 +160,8 @@ def delete_supplier(supplier_id):
         
         db.session.delete(supplier)
         db.session.commit()
+        reference_cache.invalidate('suppliers')
+        report_cache.clear()
 
         return jsonify({'message': 'Supplier deleted successfully'}), 200
 
@@ -0,0 +1,204 @@
+from flask import jsonify, make_response
+import heapq
+from datetime import datetime
+from models.products import Product
+from models.purchase import PurchaseRequest
+from models.evaluate import Evaluation
+from models.damage import DamagedItem
+from models.maintenance import Maintenance
+from models.departmentrequest import DepartmentRequest
+from sqlalchemy import tuple_
+from sqlalchemy.orm import contains_eager, joinedload
+from utils.pagination import parse_limit, encode_cursor, decode_cursor
+from utils.dates import to_manila_naive
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+def _purchase_event(purchase_request):
+    return {
+        'request_id': purchase_request.request_id,
+        'supplier_id': purchase_request.supplier_id,
+        'supplier_name': purchase_request.supplier.supplier_name if purchase_request.supplier else None,
+        'quantity': purchase_request.quantity,
+        'unit_price': str(purchase_request.unit_price),
+        'total_amount': str(purchase_request.total_amount) if purchase_request.total_amount else '0.00',
+        'status': purchase_request.status.value
+    }
+
+def _evaluation_event(evaluation):
+    return {
+        'evaluation_id': evaluation.evaluation_id,
+        'request_id': evaluation.request_id,
+        'supplier_id': evaluation.purchase_request.supplier_id,
+        'undamaged_quantity': evaluation.undamaged_quantity,
+        'damaged_quantity': evaluation.damaged_quantity
+    }
+
+def _damage_event(damaged_item):
+    return {
+        'damaged_item_id': damaged_item.damaged_item_id,
+        'evaluation_id': damaged_item.evaluation_id,
+        'quantity': damaged_item.quantity,
+        'return_status': damaged_item.return_status.value
+    }
+
+def _maintenance_event(maintenance):
+    return {
+        'maintenance_id': maintenance.maintenance_id,
+        'schedule_id': maintenance.schedule_id,
+        'engineer_name': maintenance.engineer_name,
+        'description': maintenance.description,
+        'scheduled_date': maintenance.scheduled_date.isoformat() if maintenance.scheduled_date else None,
+        'status': maintenance.status.value,
+        'notes': maintenance.notes
+    }
+
+def _department_issue_event(department_request):
+    return {
+        'department_request_id': department_request.department_request_id,
+        'department_id': department_request.department_id,
+        'department_name': department_request.department.department_name if department_request.department else None,
+        'quantity': department_request.quantity
+    }
+
+# Each source reads one product's rows on a (product_id, time) index, newest first.
+# A maintenance job appears when it was logged and again when it was closed.
+TIMELINE_SOURCES = (
+    {
+        'type': 'purchase',
+        'query': lambda product_id: PurchaseRequest.query.options(joinedload(PurchaseRequest.supplier))
+            .filter(PurchaseRequest.product_id == product_id),
+        'time': PurchaseRequest.request_date,
+        'id': PurchaseRequest.request_id,
+        'event_type': lambda purchase_request: 'purchase_request',
+        'details': _purchase_event
+    },
+    {
+        'type': 'evaluation',
+        'query': lambda product_id: Evaluation.query.join(Evaluation.purchase_request)
+            .options(contains_eager(Evaluation.purchase_request))
+            .filter(PurchaseRequest.product_id == product_id),
+        'time': Evaluation.evaluation_date,
+        'id': Evaluation.evaluation_id,
+        'event_type': lambda evaluation: 'evaluation',
+        'details': _evaluation_event
+    },
+    {
+        'type': 'damage',
+        'query': lambda product_id: DamagedItem.query.filter(DamagedItem.product_id == product_id),
+        'time': DamagedItem.created_at,
+        'id': DamagedItem.damaged_item_id,
+        'event_type': lambda damaged_item: 'damage',
+        'details': _damage_event
+    },
+    {
+        'type': 'maintenance',
+        'query': lambda product_id: Maintenance.query.filter(Maintenance.product_id == product_id),
+        'time': Maintenance.created_at,
+        'id': Maintenance.maintenance_id,
+        'event_type': lambda maintenance: 'maintenance_logged',
+        'details': _maintenance_event
+    },
+    {
+        'type': 'maintenance',
+        'query': lambda product_id: Maintenance.query.filter(
+            Maintenance.product_id == product_id,
+            Maintenance.completed_date.isnot(None)
+        ),
+        'time': Maintenance.completed_date,
+        'id': Maintenance.maintenance_id,
+        'event_type': lambda maintenance: f'maintenance_{maintenance.status.value}',
+        'details': _maintenance_event
+    },
+    {
+        'type': 'department_issue',
+        'query': lambda product_id: DepartmentRequest.query.options(joinedload(DepartmentRequest.department))
+            .filter(DepartmentRequest.product_id == product_id),
+        'time': DepartmentRequest.request_date,
+        'id': DepartmentRequest.department_request_id,
+        'event_type': lambda department_request: 'department_issue',
+        'details': _department_issue_event
+    }
+)
+TIMELINE_TYPES = tuple(dict.fromkeys(source['type'] for source in TIMELINE_SOURCES))
+
+# Restrict a source to events after the cursor in (time, source rank, id) descending order
+def _after_cursor(query, source, rank, cursor):
+    cursor_time, cursor_rank, cursor_id = cursor
+    if source['time'].type.timezone:
+        cursor_time = MANILA_TZ.localize(cursor_time)
+
+    if rank < cursor_rank:
+        return query.filter(source['time'] <= cursor_time)
+    if rank > cursor_rank:
+        return query.filter(source['time'] < cursor_time)
+    return query.filter(tuple_(source['time'], source['id']) < tuple_(cursor_time, cursor_id))
+
+def _parse_cursor(args):
+    cursor = decode_cursor(args.get('cursor'))
+    if cursor is None:
+        return None
+    try:
+        return datetime.fromisoformat(cursor[0]), int(cursor[1]), int(cursor[2])
+    except (TypeError, ValueError, IndexError):
+        raise ValueError('Invalid cursor')
+
+# Service function to get one page of a product's lifecycle events, newest first. Each source
+# contributes at most one page of its own rows, and the sorted pages are merged.
+def get_product_timeline(product_id, args):
+    try:
+        limit = parse_limit(args)
+        cursor = _parse_cursor(args)
+
+        types = TIMELINE_TYPES
+        if args.get('types'):
+            types = [name.strip() for name in args.get('types').split(',') if name.strip()]
+            unknown = [name for name in types if name not in TIMELINE_TYPES]
+            if unknown:
+                raise ValueError(f"Unknown timeline types: {', '.join(unknown)}. Use {', '.join(TIMELINE_TYPES)}")
+
+        product = Product.query.get(product_id)
+        if not product:
+            return make_response(jsonify({'message': 'Product not found'}), 404)
+
+        pages = []
+        for rank, source in enumerate(TIMELINE_SOURCES):
+            if source['type'] not in types:
+                continue
+
+            query = source['query'](product_id).filter(source['time'].isnot(None))
+            if cursor is not None:
+                query = _after_cursor(query, source, rank, cursor)
+            rows = query.order_by(source['time'].desc(), source['id'].desc()).limit(limit + 1).all()
+
+            pages.append([
+                (to_manila_naive(getattr(row, source['time'].key)), rank, getattr(row, source['id'].key), source, row)
+                for row in rows
+            ])
+
+        events = []
+        has_more = False
+        for event_time, rank, event_id, source, row in heapq.merge(*pages, key=lambda event: event[:3], reverse=True):
+            if len(events) == limit:
+                has_more = True
+                break
+            events.append((event_time, rank, event_id, source, row))
+
+        response_data = {
+            'product': product.to_dict(),
+            'events': [
+                {
+                    'event_type': source['event_type'](row),
+                    'event_time': event_time.isoformat(),
+                    **source['details'](row)
+                }
+                for event_time, rank, event_id, source, row in events
+            ],
+            'next_cursor': encode_cursor([events[-1][0].isoformat(), events[-1][1], events[-1][2]]) if has_more else None
+        }
+
+        return make_response(jsonify(response_data), 200)
+
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Bounded in-process cache with per-entry TTL and least-recently-used eviction.
+# Every gunicorn worker holds its own copy: a write invalidates the worker that
+# served it, and the TTL bounds how stale the other workers can get.
+class TTLCache:
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Return the cached value for key, calling loader to fill it on a miss
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    # Like get_or_load, but also reload when the entry was built for a different version
+    def get_or_load_versioned(self, key, version, loader):
+        entry = self.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, loader())
+            self.set(key, entry)
+        return entry[1]
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+# Products, suppliers and departments change a few times a day but are read on every page
+reference_cache = TTLCache(maxsize=128, ttl=300)
+
+# Supplier scorecards: one entry per supplier, which the full list is assembled from,
+# dropped as purchases are evaluated. The short TTL bounds staleness on the other workers.
+scorecard_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Aggregated report results, keyed by report and parameters; cleared when the underlying rows change
+report_cache = TTLCache(maxsize=256, ttl=120)
@@ -0,0 +1,28 @@
+from datetime import datetime
+import pytz
+
+MANILA_TZ = pytz.timezone("Asia/Manila")
+
+# Parse an ISO-8601 query string value into the naive Manila time the DateTime columns store
+def parse_datetime_arg(value, name):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO-8601 date or datetime')
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(MANILA_TZ).replace(tzinfo=None)
+    return parsed
+
+# Naive Manila wall-clock time for a value read from either kind of DateTime column;
+# timezone-aware columns come back aware from PostgreSQL but naive from SQLite
+def to_manila_naive(value):
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(MANILA_TZ).replace(tzinfo=None)
+
+# Today's date on the Manila calendar, whatever the server's local timezone
+def manila_today():
+    return datetime.now(MANILA_TZ).date()
@@ -0,0 +1,48 @@
+import hashlib
+from functools import wraps
+from flask import g, make_response, request
+from sqlalchemy import func, select
+from app import db
+
+# Cheap validator for the collections behind a list endpoint: max(updated_at) and
+# row count of each table, read together in one round trip without loading rows.
+# Memoized per request, so a service keying its cache on it adds no second query.
+def collection_version(*updated_at_columns):
+    versions = g.setdefault('collection_versions', {})
+    if updated_at_columns not in versions:
+        statement = select(*[
+            expression
+            for column in updated_at_columns
+            for expression in (
+                select(func.max(column)).scalar_subquery(),
+                select(func.count()).select_from(column.table).scalar_subquery()
+            )
+        ])
+        state = db.session.execute(statement).one()
+        versions[updated_at_columns] = '|'.join(str(value) for value in state)
+    return versions[updated_at_columns]
+
+def collection_etag(*updated_at_columns):
+    # The query string is part of the key, so every filtered page gets its own tag
+    raw = f"{request.full_path}|{collection_version(*updated_at_columns)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+# Answer 304 Not Modified when the client's If-None-Match still matches the collections
+def etag_collection(*updated_at_columns):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = collection_etag(*updated_at_columns)
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Let clients keep the body but always revalidate it
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
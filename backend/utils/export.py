@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from flask import Response, stream_with_context
+from app import db
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+CHUNK_SIZE = 1000
+
+def _serialize(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_serialize(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+def _ndjson_chunk(columns, rows):
+    return ''.join(
+        json.dumps({column: _serialize(value) for column, value in zip(columns, row)}) + '\n'
+        for row in rows
+    )
+
+# Stream the rows of a Core select as CSV or NDJSON. Rows come from a server-side
+# cursor CHUNK_SIZE at a time, so memory stays flat and the first chunk is sent
+# before the whole result has been read.
+def stream_export(statement, filename, export_format):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=CHUNK_SIZE))
+        columns = list(result.keys())
+
+        if export_format == 'csv':
+            yield _csv_chunk([columns])
+
+        for rows in result.partitions():
+            if export_format == 'csv':
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(columns, rows)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
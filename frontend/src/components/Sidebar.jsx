@@ -27,7 +27,7 @@ const Sidebar = () => {
   const [isManagementsOpen, setIsManagementsOpen] = useState(false);
   const [isPurchasesOpen, setIsPurchasesOpen] = useState(false);
   const [isEvaluateOpen, setIsEvaluateOpen] = useState(false);
-  const { totalPendingDamages } = useDamages();
+  const { totalPendingDamages } = useDamages({ status: 'pending', limit: 1 });
   
   const location = useLocation();
   useEffect(() => {
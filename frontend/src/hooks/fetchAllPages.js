@@ -0,0 +1,23 @@
+// Fetch every page of a keyset-paginated endpoint by following next_cursor.
+// Returns the rows under `key` from all pages, plus the first page's body for its totals.
+export async function fetchAllPages(path, key, params = {}) {
+  const items = [];
+  let first = null;
+  let cursor = null;
+
+  do {
+    const query = new URLSearchParams({ limit: 500, ...params, ...(cursor ? { cursor } : {}) });
+    const response = await fetch(`${path}?${query}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch ${path}`);
+    }
+    const data = await response.json();
+    if (!first) {
+      first = data;
+    }
+    items.push(...data[key]);
+    cursor = data.next_cursor;
+  } while (cursor);
+
+  return { items, data: first };
+}
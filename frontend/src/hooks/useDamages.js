@@ -32,8 +32,11 @@
 //   return { damages, totalDamages, totalPendingDamages, setDamages, loading, error };
 // }
 import { useState, useEffect } from 'react';
+import { fetchAllPages } from './fetchAllPages';
 
-export function useDamages() {
+// filters are passed to the server as query parameters, e.g. { status: 'pending', limit: 1 }.
+// With a limit only that first page is read (enough for the counts); otherwise every page is.
+export function useDamages(filters = {}) {
   const [damages, setDamages] = useState([]);
   const [totalDamages, setTotalDamages] = useState(0);
   const [totalPendingDamages, setTotalPendingDamages] = useState(0);
@@ -42,13 +45,21 @@ export function useDamages() {
 
   const fetchDamages = async () => {
     try {
-      const response = await fetch('/api/damages/');
-      if (!response.ok) {
-        throw new Error('Failed to fetch damages');
+      let items;
+      let data;
+      if (filters.limit) {
+        const params = new URLSearchParams(filters);
+        const response = await fetch(`/api/damages/?${params}`);
+        if (!response.ok) {
+          throw new Error('Failed to fetch damages');
+        }
+        data = await response.json();
+        items = data.damaged_items;
+      } else {
+        ({ items, data } = await fetchAllPages('/api/damages/', 'damaged_items', filters));
       }
-      const data = await response.json();
 
-      setDamages(data.damaged_items);
+      setDamages(items);
       setTotalDamages(data.total_damages);
       setTotalPendingDamages(data.total_pending_damages);
     } catch (err) {
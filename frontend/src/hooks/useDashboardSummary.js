@@ -0,0 +1,28 @@
+import { useState, useEffect } from 'react';
+
+export function useDashboardSummary() {
+  const [summary, setSummary] = useState({});
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    async function fetchSummary() {
+      try {
+        const response = await fetch('/api/dashboard/summary');
+        if (!response.ok) {
+          throw new Error('Failed to fetch dashboard summary');
+        }
+        const data = await response.json();
+        setSummary(data);
+      } catch (err) {
+        setError(err.message);
+      } finally {
+        setLoading(false);
+      }
+    }
+
+    fetchSummary();
+  }, []);
+
+  return { summary, loading, error };
+}
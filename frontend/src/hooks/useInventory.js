@@ -1,7 +1,8 @@
 import { useState, useEffect } from 'react';
+import { fetchAllPages } from './fetchAllPages';
 
 export function useInventory() {
-  const [inventory, setInventory] = useState([]); 
+  const [inventory, setInventory] = useState([]);
   const [totalQuantity, setTotalQuantity] = useState(0);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -9,12 +10,9 @@ export function useInventory() {
   useEffect(() => {
     async function fetchInventory() {
       try {
-        const response = await fetch('/api/inventory/');
-        if (!response.ok) {
-          throw new Error('Failed to fetch inventory');
-        }
-        const data = await response.json();
-        setInventory(data.inventory);
+        // The endpoint is paginated, so follow next_cursor until every row is loaded
+        const { items, data } = await fetchAllPages('/api/inventory/', 'inventory');
+        setInventory(items);
         setTotalQuantity(data.total_quantity);
       } catch (err) {
         setError(err.message);
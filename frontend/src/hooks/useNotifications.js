@@ -28,15 +28,16 @@
 // }
 import { useState, useEffect } from 'react';
 
+// How often the low stock list is refreshed
+const POLL_INTERVAL_MS = 10000;
+
 export function useNotifications() {
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    let interval;
-
-    const fetchNotifications = async () => {
+    async function fetchNotifications() {
       try {
         const response = await fetch('/api/inventory/notifications');
         if (!response.ok) {
@@ -44,21 +45,22 @@ export function useNotifications() {
         }
         const data = await response.json();
         setNotifications(data || []);
+        setError(null);
       } catch (err) {
         setError(err.message);
       } finally {
         setLoading(false);
       }
-    };
-
-    fetchNotifications(); 
+    }
 
-    // Set up polling interval for real-time updates
-    interval = setInterval(() => {
-      fetchNotifications();
-    }, 1000);
+    // Poll instead of holding a connection open: a short request never ties up a
+    // worker, and it reads the database, so changes made through any worker show up.
+    // Pushing threshold crossings needs an async worker and a cross-process broker
+    // (e.g. Redis pub/sub), neither of which the backend runs yet; until then this
+    // interval bounds how late a new low-stock alert can appear.
+    fetchNotifications();
+    const interval = setInterval(fetchNotifications, POLL_INTERVAL_MS);
 
-    // Clear the interval on unmount
     return () => clearInterval(interval);
   }, []);
 
@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react';
+import { fetchAllPages } from './fetchAllPages';
 
-export function usePurchase() {
+// filters are passed to the server as query parameters, e.g. { status: 'pending' }
+export function usePurchase(filters = {}) {
   const [purchase, setPurchase] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -8,16 +10,13 @@ export function usePurchase() {
   useEffect(() => {
     async function fetchPurchase() {
       try {
-        const response = await fetch('/api/purchase/');
-        if (!response.ok) {
-          throw new Error('Failed to fetch purchase');
-        }
-        const data = await response.json();
-        setPurchase(data);
+        // The endpoint is paginated, so follow next_cursor until every matching request is loaded
+        const { items } = await fetchAllPages('/api/purchase/', 'purchase_requests', filters);
+        setPurchase(items);
       } catch (err) {
         setError(err.message);
       } finally {
-        setLoading(false); 
+        setLoading(false);
       }
     }
 
@@ -3,9 +3,7 @@ import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faBox, faUserAlt, faTools, faTrash } from '@fortawesome/free-solid-svg-icons';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { PieChart, Pie, Cell } from 'recharts';
-import { useInventory } from '../hooks/useInventory';
-import { useSuppliers } from '../hooks/useSupplier';
-import { useMaintenance } from '../hooks/useMaintenance';
+import { useDashboardSummary } from '../hooks/useDashboardSummary';
 import { useGetTopPurchase } from '../hooks/useGetTopPurchase';
 import { useTopPurchasesPerDepartment } from '../hooks/useTopPurchasesPerDepartment';
 import { useDepartmentRequest } from '../hooks/useDepartmentRequest';
@@ -28,10 +26,10 @@ const CustomTooltip = ({ active, payload }) => {
 const colors = ['#8884d8', '#82ca9d', '#ffc658', '#ff6f61', '#8dd1e1', '#a4de6c', '#d0ed57', '#ffa07a', '#ff69b4', '#ffb6c1'];
 
 export default function Dashboard() {
-  const { totalQuantity } = useInventory();
+  const { summary } = useDashboardSummary();
+  const { total_quantity: totalQuantity = 0, total_suppliers: totalSuppliers = 0 } = summary;
+  const { total_maintenance: totalMaintenance = 0, total_condemned: totalCondemned = 0 } = summary;
   const { departmentRequests, loading, error } = useDepartmentRequest();
-  const { totalSuppliers } = useSuppliers();
-  const { totalMaintenance, totalCondemned } = useMaintenance();
   const { topPurchases, loading: loadingTopPurchases, error: errorTopPurchases } = useGetTopPurchase();
   const { topPurchasesDepartment } = useTopPurchasesPerDepartment();
 
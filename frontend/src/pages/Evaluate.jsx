@@ -5,7 +5,7 @@ import { usePurchase } from '../hooks/usePurchase';
 import toast from 'react-hot-toast';
 
 export default function PurchaseList() {
-  const { purchase, setPurchase, loading, error } = usePurchase();
+  const { purchase, setPurchase, loading, error } = usePurchase({ status: 'pending' });
   const [isLoading, setIsLoading] = useState(false);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [selectedRequest, setSelectedRequest] = useState(null);
@@ -115,6 +115,7 @@ export default function PurchaseList() {
             onChange={(e) => setStatusFilter(e.target.value)}
           >
             <option value="">All Status</option>
+            <option value="draft">Draft</option>
             <option value="pending">Pending</option>
             <option value="approved">Approved</option>
             <option value="rejected">Rejected</option>